@@ -1,9 +1,19 @@
 from flask import Flask, jsonify
 from flask_migrate import Migrate
 from config import Config
-from .db import db
+from .json_provider import FastJSONProvider
+from .compression import init_compression
+from .db import db, init_query_profiler, init_sqlite_pragmas, init_storage_profile
 from .auth import auth_bp
 from .routes import routes_bp
+from .bench import bench_cli
+from .query_plans import check_query_plans_command
+from .progress import compact_phase_progress_command
+from .stats import rebuild_player_stats_command
+from .analytics import boss_analytics_command
+from .seed_large import seed_large_command
+from .metrics import init_metrics
+from .profiler import init_profiler
 
 
 migrate = Migrate()
@@ -13,24 +23,41 @@ def create_app(config_cls = Config) -> Flask:
 
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(config_cls)
+    app.json = FastJSONProvider(app)
 
     app.config['SECRET_KEY'] = 'your secret key'
 
+    init_storage_profile(app)
     db.init_app(app)
+    init_sqlite_pragmas(app)
     migrate.init_app(app, db)
+    init_query_profiler(app)
+    init_compression(app)
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(routes_bp)
+    init_profiler(app)
+    # Por último: o layout das métricas é montado a partir de todas as rotas registradas
+    init_metrics(app)
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(compact_phase_progress_command)
+    app.cli.add_command(rebuild_player_stats_command)
+    app.cli.add_command(boss_analytics_command)
+    app.cli.add_command(seed_large_command)
 
     @app.cli.command('init-db')
     def init_db_command():
         from .models import Player
 
         with app.app_context():
-            if not Player.query.get(1):
-                admin = Player('admin', 'admin@gmail.com', '123')
+            admin = Player.query.filter_by(username = 'admin').one_or_none()
+            if admin is None:
+                admin = Player('admin', 'admin@gmail.com', '123', role = 'admin')
                 db.session.add(admin)
-                db.session.commit()
+            else:
+                admin.set_role('admin')
+            db.session.commit()
     
     @app.errorhandler(400)
     def bad_request(error: Exception):
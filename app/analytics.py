@@ -0,0 +1,241 @@
+import json
+import threading
+import time
+from typing import Iterator
+import click
+from flask import current_app
+from sqlalchemy import String, case, extract, func, select, type_coerce
+from .catalog import catalog
+from .db import db
+from .models import Battle, Boss, ResultType
+
+
+RESULT_CODES = {result.name: code for code, result in enumerate(ResultType)}
+
+
+def _group_percentiles(np, groups, values, weights, size: int, percentiles):
+    """
+    Percentis de cada grupo (0..size-1) a partir de pares (valor, ocorrências)
+    ordenados por grupo e valor, com interpolação linear como
+    ``numpy.percentile``, sem laço por grupo. Grupos vazios ficam com NaN.
+    """
+
+    q = np.asarray(percentiles, dtype = float) / 100
+    totals = np.bincount(groups, weights = weights, minlength = size).astype(np.int64)
+    if not len(values):
+        return np.full((size, len(q)), np.nan)
+
+    # A posição de ordem r (a partir de 0) está no primeiro par cujo acumulado passa de r
+    cumulative = np.cumsum(weights)
+    starts = np.concatenate(([0], np.cumsum(totals)[:-1]))
+    positions = starts[:, None] + q[None, :] * np.maximum(totals - 1, 0)[:, None]
+    last = cumulative[-1] - 1
+    low = values[np.searchsorted(cumulative, np.clip(np.floor(positions), 0, last), side = 'right')]
+    high = values[np.searchsorted(cumulative, np.clip(np.ceil(positions), 0, last), side = 'right')]
+    result = low + (high - low) * (positions - np.floor(positions))
+    result[totals == 0] = np.nan
+    return result
+
+
+def _merge_histogram(np, keys, weights, boss_ids, values):
+    """Soma as ocorrências de cada par (boss, valor) do lote ao histograma acumulado."""
+
+    if not len(boss_ids):
+        return keys, weights
+
+    bosses = np.concatenate((keys[:, 0], boss_ids))
+    values = np.concatenate((keys[:, 1], values))
+    weights = np.concatenate((weights, np.ones(len(boss_ids))))
+    order = np.lexsort((values, bosses))
+    bosses, values, weights = bosses[order], values[order], weights[order]
+
+    # Início de cada par distinto, na ordem (boss, valor)
+    first = np.ones(len(order), dtype = bool)
+    first[1:] = (bosses[1:] != bosses[:-1]) | (values[1:] != values[:-1])
+    starts = np.flatnonzero(first)
+    return np.column_stack((bosses[starts], values[starts])), np.add.reduceat(weights, starts)
+
+
+class BossTotals:
+    """
+    Totais por boss acumulados lote a lote: batalhas, vitórias, derrotas,
+    fugas, batalhas por hora do dia e quantas vitórias deram cada valor de
+    recompensa. A memória depende do número de bosses e de valores distintos
+    de recompensa, não do número de batalhas.
+    """
+
+    # Colunas de ``counts``: batalhas, vitórias, derrotas, fugas e as 24 horas
+    HOURS = 4
+
+    def __init__(self, np) -> None:
+        self.np = np
+        self.bosses = np.empty(0, dtype = np.int64)
+        self.counts = np.zeros((0, self.HOURS + 24))
+        self.coins = (np.empty((0, 2)), np.empty(0))
+        self.experience = (np.empty((0, 2)), np.empty(0))
+
+    def add(self, boss_ids, results, coins, experience, hours) -> None:
+
+        np = self.np
+        bosses, groups = np.unique(boss_ids, return_inverse = True)
+        size = len(bosses)
+        wins = results == RESULT_CODES['WIN']
+
+        counts = np.zeros((size, self.HOURS + 24))
+        counts[:, 0] = np.bincount(groups, minlength = size)
+        counts[:, 1] = np.bincount(groups, weights = wins, minlength = size)
+        counts[:, 2] = np.bincount(groups, weights = results == RESULT_CODES['LOSS'], minlength = size)
+        counts[:, 3] = np.bincount(groups, weights = results == RESULT_CODES['FLEE'], minlength = size)
+        valid_hours = ~np.isnan(hours)
+        counts[:, self.HOURS:] = np.bincount(
+            groups[valid_hours] * 24 + hours[valid_hours].astype(np.int64),
+            minlength = size * 24
+        ).reshape(size, 24)
+
+        merged_bosses = np.union1d(self.bosses, bosses)
+        merged = np.zeros((len(merged_bosses), self.HOURS + 24))
+        merged[np.searchsorted(merged_bosses, self.bosses)] += self.counts
+        merged[np.searchsorted(merged_bosses, bosses)] += counts
+        self.bosses, self.counts = merged_bosses, merged
+
+        # Recompensas só são creditadas nas vitórias
+        self.coins = _merge_histogram(np, *self.coins, boss_ids[wins], np.nan_to_num(coins[wins]))
+        self.experience = _merge_histogram(np, *self.experience, boss_ids[wins], np.nan_to_num(experience[wins]))
+
+    def percentiles(self, histogram, percentiles):
+        """Percentis por boss, na ordem de ``bosses``, de um dos histogramas de recompensa."""
+
+        keys, weights = histogram
+        groups = self.np.searchsorted(self.bosses, keys[:, 0])
+        return _group_percentiles(self.np, groups, keys[:, 1], weights, len(self.bosses), percentiles)
+
+
+class BossAnalytics:
+    """
+    Indicadores de dificuldade por boss (taxas de vitória e fuga, percentis
+    das recompensas e histograma por hora do dia), calculados com NumPy.
+
+    As colunas de ``battle`` são lidas em lotes de ``ANALYTICS_CHUNK_SIZE``
+    linhas e cada lote é somado a um ``BossTotals``, então a memória não
+    cresce com a tabela. O resultado fica em cache até a contagem, o maior id
+    de ``battle`` ou a versão ``'battles'`` do catálogo mudar; as rotas que
+    alteram ou apagam batalhas incrementam essa versão, e todos os workers
+    recalculam.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: tuple[int, int, int] | None = None
+        self._result: dict | None = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._key = None
+            self._result = None
+
+    def get(self) -> dict:
+
+        count, max_id = db.session.execute(select(func.count(Battle.id), func.max(Battle.id))).one()
+        key = (count, max_id or 0, catalog.version('battles'))
+        with self._lock:
+            if self._key == key:
+                return self._result
+
+        result = self.compute()
+        with self._lock:
+            self._key = key
+            self._result = result
+        return result
+
+    def _chunks(self, np, chunk_size: int) -> Iterator[tuple]:
+        """Lê ``battle`` em lotes e gera uma coluna NumPy por campo para cada lote."""
+
+        # O código do resultado e a hora já vêm calculados do banco, para que
+        # cada lote vire arrays sem processar linha a linha em Python
+        result = type_coerce(Battle.result, String)
+        statement = select(
+            Battle.boss_id,
+            case(*((result == name, code) for name, code in RESULT_CODES.items()), else_ = -1),
+            Battle.reward_coins,
+            Battle.reward_experience,
+            extract('hour', Battle.created_at)
+        ).where(Battle.boss_id.is_not(None))
+
+        # Cursor do driver direto, sem montar um Row do SQLAlchemy por linha
+        connection = db.session.connection()
+        sql = str(statement.compile(dialect = connection.dialect, compile_kwargs = {'literal_binds': True}))
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(sql)
+            while partition := cursor.fetchmany(chunk_size):
+                # Uma conversão só por lote; valores nulos viram NaN
+                boss_ids, results, coins, experience, hours = np.array(partition, dtype = float).T
+                yield boss_ids.astype(np.int64), results.astype(np.int8), coins, experience, hours
+        finally:
+            cursor.close()
+
+    def compute(self) -> dict:
+
+        import numpy as np
+
+        config = current_app.config
+        percentiles = config['ANALYTICS_PERCENTILES']
+        start = time.perf_counter()
+
+        totals = BossTotals(np)
+        for chunk in self._chunks(np, config['ANALYTICS_CHUNK_SIZE']):
+            totals.add(*chunk)
+
+        bosses = totals.bosses
+        battles, wins, losses, flees = totals.counts[:, :BossTotals.HOURS].astype(np.int64).T
+        by_hour = totals.counts[:, BossTotals.HOURS:].astype(np.int64)
+        coin_percentiles = totals.percentiles(totals.coins, percentiles)
+        experience_percentiles = totals.percentiles(totals.experience, percentiles)
+
+        names = dict(db.session.execute(select(Boss.id, Boss.name).where(Boss.id.in_(bosses.tolist()))).all())
+
+        def distribution(row) -> dict:
+            return {f'p{p:g}': None if np.isnan(value) else round(float(value), 2) for p, value in zip(percentiles, row)}
+
+        return {
+            'battles': int(battles.sum()),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'bosses': [
+                {
+                    'boss_id': int(boss_id),
+                    'name': names.get(int(boss_id)),
+                    'battles': int(battles[i]),
+                    'wins': int(wins[i]),
+                    'losses': int(losses[i]),
+                    'flees': int(flees[i]),
+                    'win_rate': round(float(wins[i] / battles[i]), 4),
+                    'flee_rate': round(float(flees[i] / battles[i]), 4),
+                    'reward_coins': distribution(coin_percentiles[i]),
+                    'reward_experience': distribution(experience_percentiles[i]),
+                    'battles_by_hour': by_hour[i].tolist()
+                }
+                for i, boss_id in enumerate(bosses)
+            ]
+        }
+
+
+boss_analytics = BossAnalytics()
+
+
+@click.command('boss-analytics')
+@click.option('--json', 'as_json', is_flag = True, help = 'Imprime o resultado completo em JSON.')
+def boss_analytics_command(as_json: bool):
+    """Calcula os indicadores de dificuldade por boss a partir da tabela ``battle``."""
+
+    result = boss_analytics.compute()
+    if as_json:
+        click.echo(json.dumps(result, indent = 2, ensure_ascii = False))
+        return
+
+    click.echo(f"{result['battles']} batalhas em {result['elapsed_ms']} ms")
+    for boss in result['bosses']:
+        coins = ' '.join(f'{name}={value}' for name, value in boss['reward_coins'].items())
+        click.echo(
+            f"{boss['boss_id']:>5} {str(boss['name'])[:20]:<20} {boss['battles']:>9} batalhas  "
+            f"vitória {boss['win_rate']:6.1%}  fuga {boss['flee_rate']:6.1%}  moedas {coins}"
+        )
@@ -1,9 +1,15 @@
 import datetime
+import sys
+import threading
+import time
 import jwt
+from sqlalchemy import select
+from .db import db
 from .models import Player
+from .passwords import passwords
+from collections import OrderedDict
 from functools import wraps
-from flask import Blueprint, request, jsonify, current_app, abort
-from werkzeug.security import check_password_hash
+from flask import Blueprint, request, jsonify, current_app, abort, g
 from typing import Callable, NoReturn, overload
 
 
@@ -23,39 +29,210 @@ def login():
             'message': 'Invalid username'
         }
     
-    if not check_password_hash(player.password_hash, password):
+    if not passwords.verify(player.password_hash, password):
         return {
             'message': 'Invalid username/password'
         }
 
-    token = jwt.encode(
+    if passwords.needs_rehash(player.password_hash):
+        player.password_hash = passwords.hash(password)
+        db.session.commit()
+
+    return jsonify({
+        "token": issue_token(player)
+    })
+
+
+def issue_token(player: Player) -> str:
+
+    return jwt.encode(
         {
             'id': player.id,
-            'username': username,
+            'username': player.username,
+            'role': player.role,
+            'ver': player.token_version,
             'exp': datetime.datetime.now(datetime.UTC) + datetime.timedelta(minutes = 30)
         },
         current_app.config["SECRET_KEY"],
         algorithm = "HS256"
     )
-    
-    return jsonify({
-        "token": token
-    })
+
+
+class TokenCache:
+    """
+    LRU limitado de tokens já verificados.
+
+    Um token repetido é aceito sem verificar a assinatura novamente até o fim
+    da sua validade (claim ``exp``) ou até ``ttl`` segundos após a verificação,
+    o que vier primeiro. A revogação é conferida à parte, a cada uso.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tokens: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    def get(self, token: str) -> dict | None:
+
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._tokens[token]
+                return None
+
+            self._tokens.move_to_end(token)
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+
+        if self.maxsize <= 0 or 'exp' not in payload:
+            return
+
+        expires_at = payload['exp']
+        if self.ttl is not None:
+            expires_at = min(expires_at, time.time() + self.ttl)
+
+        with self._lock:
+            self._tokens[token] = (payload, expires_at)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last = False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+def _token_cache() -> TokenCache:
+
+    cache = current_app.extensions.get('auth_token_cache')
+    if cache is None:
+        cache = current_app.extensions['auth_token_cache'] = TokenCache(
+            current_app.config['AUTH_TOKEN_CACHE_SIZE'],
+            current_app.config['AUTH_TOKEN_CACHE_TTL']
+        )
+    return cache
+
+
+# Versão mínima de um jogador apagado: nenhum token dele passa
+DELETED = sys.maxsize
+
+
+class RevocationList:
+    """
+    Versão mínima de token aceita para cada jogador que já teve tokens revogados.
+
+    Só os jogadores com ``token_version > 0`` são carregados, em uma única
+    consulta a cada ``ttl`` segundos; conferir um token é uma busca em
+    dicionário. A existência de cada jogador também é confirmada pela chave
+    primária na primeira vez que um token dele aparece em cada janela de
+    ``ttl`` segundos, então o token de um jogador apagado deixa de valer. Uma
+    revogação vale na hora no worker que a fez e nos demais em até ``ttl``
+    segundos, e os tokens expiram de qualquer forma em 30 minutos.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions: dict[int, int] = {}
+        self._existing: set[int] = set()
+        self._loaded_at: float | None = None
+
+    def _ensure_loaded(self) -> None:
+
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+
+        versions = dict(db.session.execute(
+            select(Player.id, Player.token_version).where(Player.token_version > 0)
+        ).all())
+        with self._lock:
+            # Revogações feitas neste worker durante a consulta continuam valendo
+            for player_id, version in self._versions.items():
+                if version > versions.get(player_id, 0):
+                    versions[player_id] = version
+            self._versions = versions
+            self._existing = set()
+            self._loaded_at = time.monotonic()
+
+    def _confirm(self, player_id: int) -> None:
+        """Confere pela chave primária se o jogador ainda existe e qual a versão atual dos tokens."""
+
+        version = db.session.scalar(select(Player.token_version).where(Player.id == player_id))
+        self.revoke(player_id, DELETED if version is None else version)
+        with self._lock:
+            self._existing.add(player_id)
+
+    def is_revoked(self, player_id: int, version: int) -> bool:
+
+        self._ensure_loaded()
+        if player_id not in self._existing:
+            self._confirm(player_id)
+        return version < self._versions.get(player_id, 0)
+
+    def revoke(self, player_id: int, version: int) -> None:
+        with self._lock:
+            self._versions[player_id] = max(version, self._versions.get(player_id, 0))
+
+
+def _revocations() -> RevocationList:
+
+    revocations = current_app.extensions.get('auth_revocations')
+    if revocations is None:
+        revocations = current_app.extensions['auth_revocations'] = RevocationList(current_app.config['AUTH_REVOCATION_TTL'])
+    return revocations
+
+
+def decode_token(token: str) -> dict:
+    """Verifica o token e retorna o seu conteúdo, usando o cache de tokens verificados."""
+
+    cache = _token_cache()
+    payload = cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms = ['HS256'])
+
+        except jwt.ExpiredSignatureError:
+            abort(401, "Token has expired!")
+
+        except jwt.InvalidTokenError:
+            abort(401, "Invalid token!")
+
+        cache.put(token, payload)
+
+    # Conferido também nos tokens em cache: é só uma busca em memória
+    if 'ver' in payload and _revocations().is_revoked(payload['id'], payload['ver']):
+        abort(401, "Token has been revoked!")
+    return payload
+
+
+def revoke_tokens(player: Player, deleted: bool = False) -> None:
+    """
+    Rejeita neste worker, imediatamente, os tokens do jogador anteriores à sua
+    ``token_version`` atual (ex.: após uma mudança de papel), ou todos os
+    tokens dele se o jogador foi apagado.
+    """
+    _revocations().revoke(player.id, DELETED if deleted else player.token_version)
+
+
+def get_current_claims() -> dict:
+    """Retorna o conteúdo verificado do token da requisição atual."""
+
+    if 'token_claims' not in g:
+        g.token_claims = decode_token(get_token())
+    return g.token_claims
 
 
 def get_current_user_id(token: str | None = None) -> int:
 
-    if token is None:
-        token = get_token()
-    try:
-        data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms = ['HS256'])
-        return data['id']
-    
-    except jwt.ExpiredSignatureError:
-        abort(401, "Token has expired!")
-    
-    except jwt.InvalidTokenError:
-        abort(401, "Invalid token!")
+    if token is not None:
+        return decode_token(token)['id']
+    return get_current_claims()['id']
 
     
 def get_token() -> str:
@@ -83,9 +260,7 @@ def admin_required(f: Callable):
     @wraps(f)
     def decorated(*args, **kwargs):
         
-        current_user_id = get_current_user_id()
-        
-        if not is_admin(current_user_id):
+        if not is_admin():
             abort(403, "You don't have access to this page")
         
         return f(*args, **kwargs)
@@ -93,9 +268,14 @@ def admin_required(f: Callable):
     return decorated
 
 
-def is_admin(user_id: int):
-    player = Player.query.get_or_404(user_id)
-    return player.username == 'admin'
+def is_admin() -> bool:
+    """Indica se o usuário da requisição atual é administrador, pelo papel no token."""
+
+    claims = get_current_claims()
+    if 'role' not in claims:
+        # Tokens emitidos antes do claim de papel existir
+        return Player.query.get_or_404(claims['id']).role == 'admin'
+    return claims['role'] == 'admin'
 
 
 @overload
@@ -106,6 +286,6 @@ def validate_access(user_id: int, silent: bool = True) -> bool: ...
 def validate_access(user_id: int, silent: bool = False) -> bool:
 
     current_user_id = get_current_user_id()
-    if current_user_id != user_id and not is_admin(current_user_id):
+    if current_user_id != user_id and not is_admin():
         abort(403, "Você não tem acesso a essa página")
     return None
@@ -0,0 +1,582 @@
+import http.client
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+import json
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+from urllib.parse import urlsplit
+import click
+import jwt
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.exc import OperationalError
+from werkzeug.serving import make_server
+from . import auth
+from .db import db, configure_sqlite
+from .json_provider import FastJSONProvider
+from .models import Battle, Boss, Insignia, Item, Phase, PhaseProgress, Player, PlayerInsignia, ResultType
+
+
+bench_cli = AppGroup('bench', help = 'Benchmarks dos caminhos críticos da API.')
+
+
+def _time_per_request(fn, iterations: int, **request_kwargs) -> float:
+    """
+    Executa ``fn`` dentro de ``iterations`` contextos de requisição novos e
+    retorna o tempo médio de ``fn`` em microssegundos, sem contar a montagem
+    do contexto.
+    """
+
+    app = current_app._get_current_object()
+    total = 0.0
+    for _ in range(iterations):
+        # Um contexto de aplicação novo por iteração, como em uma requisição real (``g`` vazio)
+        with app.app_context(), app.test_request_context(**request_kwargs):
+            start = time.perf_counter()
+            fn()
+            total += time.perf_counter() - start
+    return total / iterations * 1e6
+
+
+@bench_cli.command('auth')
+@click.option('--iterations', default = 20000, show_default = True)
+def bench_auth(iterations: int):
+    """Custo da autenticação por requisição, antes e depois do cache de tokens."""
+
+    app = current_app._get_current_object()
+    secret = app.config['SECRET_KEY']
+    token = jwt.encode(
+        {'id': 1, 'username': 'bench', 'exp': int(time.time()) + 3600},
+        secret,
+        algorithm = 'HS256'
+    )
+    headers = {'x-access-token': token}
+
+    def legacy_request():
+        # token_required e validate_access decodificavam o token uma vez cada
+        for _ in range(2):
+            jwt.decode(auth.get_token(), secret, algorithms = ['HS256'])
+
+    def current_request():
+        auth.get_current_user_id()
+        auth.get_current_user_id()
+
+    cache = app.extensions.pop('auth_token_cache', None)
+    results = {}
+    try:
+        results['legacy (2 decodes)'] = _time_per_request(legacy_request, iterations, headers = headers)
+
+        app.extensions['auth_token_cache'] = auth.TokenCache(0)
+        results['1 decode, sem cache'] = _time_per_request(current_request, iterations, headers = headers)
+
+        app.extensions['auth_token_cache'] = auth.TokenCache(
+            app.config['AUTH_TOKEN_CACHE_SIZE'],
+            app.config['AUTH_TOKEN_CACHE_TTL']
+        )
+        results['1 decode, com cache'] = _time_per_request(current_request, iterations, headers = headers)
+
+    finally:
+        app.extensions.pop('auth_token_cache', None)
+        if cache is not None:
+            app.extensions['auth_token_cache'] = cache
+
+    baseline = results['legacy (2 decodes)']
+    for name, micros in results.items():
+        click.echo(f'{name:<24} {micros:8.2f} µs/req  ({baseline / micros:6.2f}x)')
+
+
+@bench_cli.command('storage')
+@click.option('--seconds', default = 5.0, show_default = True, help = 'Duração de cada perfil.')
+@click.option('--readers', default = 6, show_default = True)
+@click.option('--writers', default = 2, show_default = True)
+@click.option('--players', default = 5000, show_default = True)
+@click.argument('profiles', nargs = -1)
+def bench_storage(seconds: float, readers: int, writers: int, players: int, profiles: tuple[str, ...]):
+    """
+    Vazão de leituras e escritas concorrentes em um SQLite temporário para
+    cada perfil de armazenamento (padrão: 'default' e 'production').
+    """
+
+    all_profiles = current_app.config['STORAGE_PROFILES']
+    for name in profiles or ('default', 'production'):
+
+        profile = all_profiles[name]
+        with tempfile.TemporaryDirectory() as directory:
+
+            engine = create_engine('sqlite:///' + os.path.join(directory, 'bench.db'), **profile['engine_options'])
+            configure_sqlite(engine, profile['pragmas'])
+            db.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(Player.__table__.insert(), [
+                    {'username': f'p{i}', 'email': f'p{i}@bench.local', 'password_hash': '!', 'experience': 0, 'coins': 0, 'role': 'player', 'token_version': 0}
+                    for i in range(1, players + 1)
+                ])
+
+            counts = Counter()
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def read(rng: random.Random):
+                with engine.connect() as conn:
+                    player_id = rng.randint(1, players)
+                    conn.execute(text('SELECT id, username, experience, coins FROM player WHERE id = :id'), {'id': player_id}).one()
+                    conn.execute(text('SELECT count(*) FROM battle WHERE player_id = :id'), {'id': player_id}).scalar()
+                return 'reads'
+
+            def write(rng: random.Random):
+                with engine.begin() as conn:
+                    player_id = rng.randint(1, players)
+                    conn.execute(text('UPDATE player SET coins = coins + 1, experience = experience + 10 WHERE id = :id'), {'id': player_id})
+                    conn.execute(
+                        text("INSERT INTO battle (player_id, result, reward_coins, reward_experience) VALUES (:id, 'WIN', 1, 10)"),
+                        {'id': player_id}
+                    )
+                return 'writes'
+
+            def worker(operation, seed: int):
+                rng = random.Random(seed)
+                local = Counter()
+                while time.perf_counter() < deadline:
+                    try:
+                        local[operation(rng)] += 1
+                    except OperationalError:
+                        local['errors'] += 1
+                with lock:
+                    counts.update(local)
+
+            threads = [threading.Thread(target = worker, args = (read, i)) for i in range(readers)]
+            threads += [threading.Thread(target = worker, args = (write, readers + i)) for i in range(writers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            engine.dispose()
+
+        click.echo(
+            f'{name:<12} leituras: {counts["reads"] / seconds:9.0f}/s   '
+            f'escritas: {counts["writes"] / seconds:7.0f}/s   '
+            f'erros: {counts["errors"]}'
+        )
+
+
+@bench_cli.command('json')
+@click.option('--rows', default = 10000, show_default = True, help = 'Batalhas por resposta.')
+@click.option('--repeat', default = 5, show_default = True)
+@click.option('--seed', default = 42, show_default = True)
+def bench_json(rows: int, repeat: int, seed: int):
+    """
+    Tempo de serialização de uma listagem grande de batalhas: ``to_dict()``
+    com conversões por linha e ``json`` da biblioteca padrão (como antes)
+    contra o ``FastJSONProvider`` sem e com ``orjson``.
+    """
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    bosses = [Boss(id = i, name = f'boss-{i}', health = rng.randint(100, 5000)) for i in range(1, 21)]
+    players = [
+        Player(f'p{i}', f'p{i}@bench.local', password_hash = '!')
+        for i in range(1, 101)
+    ]
+    for i, player in enumerate(players, 1):
+        player.id = i
+        player.experience = rng.randint(0, 100000)
+        player.coins = rng.randint(0, 10000)
+        player.created_at = start
+        player.saved_at = start + timedelta(seconds = rng.randint(0, 10 ** 7))
+
+    battles = []
+    for i in range(1, rows + 1):
+        battle = Battle(
+            id = i,
+            result = rng.choice(list(ResultType)),
+            reward_coins = rng.randint(0, 500),
+            reward_experience = rng.randint(0, 1000),
+            created_at = start + timedelta(seconds = i)
+        )
+        battle.player = rng.choice(players)
+        battle.boss = rng.choice(bosses)
+        battles.append(battle)
+
+    def legacy():
+        data = []
+        for battle in battles:
+            item = battle.to_dict()
+            item['result'] = item['result'].value
+            item['created_at'] = item['created_at'].isoformat()
+            for key in ('created_at', 'saved_at'):
+                item['player'][key] = item['player'][key].isoformat()
+            data.append(item)
+        return json.dumps(data, separators = (',', ':'), sort_keys = True).encode()
+
+    provider = FastJSONProvider(current_app._get_current_object())
+
+    def fast(use_orjson: bool):
+        def run():
+            provider.use_orjson = use_orjson
+            return provider.response([battle.to_dict() for battle in battles]).get_data()
+        return run
+
+    cases = {'legacy (json + isoformat)': legacy, 'provider, json': fast(False)}
+    if provider.use_orjson:
+        cases['provider, orjson'] = fast(True)
+
+    outputs = {}
+    results = {}
+    for name, fn in cases.items():
+        best = float('inf')
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            outputs[name] = fn()
+            best = min(best, time.perf_counter() - begin)
+        results[name] = best * 1000
+
+    reference = json.loads(outputs['legacy (json + isoformat)'])
+    baseline = results['legacy (json + isoformat)']
+    for name, millis in results.items():
+        same = 'ok' if json.loads(outputs[name]) == reference else 'DIFERENTE'
+        click.echo(f'{name:<28} {millis:8.1f} ms  ({baseline / millis:5.2f}x)  {len(outputs[name]):>9} bytes  {same}')
+
+
+class Scenario(NamedTuple):
+    """Uma rota do suite: ``build`` sorteia (método, caminho, corpo JSON, cabeçalhos) de uma requisição."""
+
+    name: str
+    build: Callable[[random.Random], tuple[str, str, dict | None, dict]]
+
+
+def _scenarios(players: list[tuple[int, str, dict]], admin: dict, boss_ids: list[int], phase_ids: list[int], password: str) -> list[Scenario]:
+
+    def login(rng: random.Random):
+        _, username, _ = rng.choice(players)
+        return 'POST', '/auth/login', {'username': username, 'password': password}, {}
+
+    def record_battle(rng: random.Random):
+        player_id, _, headers = rng.choice(players)
+        result = rng.choices(list(ResultType), weights = (6, 3, 1))[0]
+        body = {
+            'result': result.value,
+            'boss_id': rng.choice(boss_ids) if boss_ids else None,
+            'reward_coins': rng.randint(10, 100),
+            'reward_experience': rng.randint(50, 300)
+        }
+        return 'POST', f'/players/{player_id}/battles', body, headers
+
+    def complete_phase(rng: random.Random):
+        player_id, _, headers = rng.choice(players)
+        return 'POST', f'/players/{player_id}/phases', {'phase_id': rng.choice(phase_ids)}, headers
+
+    def player_battles(rng: random.Random):
+        player_id, _, headers = rng.choice(players)
+        return 'GET', f'/players/{player_id}/battles', None, headers
+
+    def listing(path: str, headers: dict | None = None):
+        return lambda rng: ('GET', path, None, headers or {})
+
+    scenarios = [
+        Scenario('login', login),
+        Scenario('record_battle', record_battle),
+        Scenario('complete_phase', complete_phase),
+        Scenario('ranking', listing('/players/ranking')),
+        Scenario('player_battles', player_battles),
+        Scenario('items', listing('/items/')),
+        Scenario('bosses', listing('/boss/')),
+        Scenario('phases', listing('/phases/')),
+        Scenario('insignias', listing('/insignias/')),
+        Scenario('admin_players', listing('/players/', admin))
+    ]
+    # Sem fases no banco não há o que completar
+    return [scenario for scenario in scenarios if phase_ids or scenario.name != 'complete_phase']
+
+
+SCENARIO_NAMES = (
+    'login', 'record_battle', 'complete_phase', 'ranking', 'player_battles',
+    'items', 'bosses', 'phases', 'insignias', 'admin_players'
+)
+
+
+def _query_count(headers) -> int | None:
+    value = headers.get('X-Query-Count')
+    return int(value) if value is not None else None
+
+
+def _client_sender(app):
+    """Envia as requisições pelo test client do Flask, sem rede."""
+
+    def make():
+        client = app.test_client()
+
+        def send(method: str, path: str, body: dict | None, headers: dict):
+            response = client.open(path, method = method, json = body, headers = headers)
+            return response.status_code, _query_count(response.headers)
+        return send
+    return make
+
+
+def _http_sender(url: str):
+    """Envia as requisições por HTTP, com uma conexão keep-alive por thread."""
+
+    parts = urlsplit(url)
+    prefix = parts.path.rstrip('/')
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+
+    def make():
+        connection = connection_class(parts.hostname, parts.port, timeout = 60)
+
+        def send(method: str, path: str, body: dict | None, headers: dict):
+            payload = None
+            if body is not None:
+                payload = json.dumps(body).encode()
+                headers = {**headers, 'Content-Type': 'application/json'}
+            try:
+                connection.request(method, prefix + path, body = payload, headers = headers)
+                response = connection.getresponse()
+                response.read()
+            except (http.client.HTTPException, OSError):
+                # Status 0: falha de conexão; a próxima requisição reconecta
+                connection.close()
+                return 0, None
+            if response.will_close:
+                connection.close()
+            return response.status, _query_count(response.headers)
+        return send
+    return make
+
+
+def _measure(make_sender, jobs: list[tuple], concurrency: int) -> tuple[list[float], list[int], Counter, float]:
+    """
+    Divide ``jobs`` entre ``concurrency`` threads e retorna as latências (s),
+    as contagens de consultas, os status e o tempo total de parede.
+    """
+
+    latencies: list[float] = []
+    queries: list[int] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+
+    def worker(chunk: list[tuple]):
+        send = make_sender()
+        local_latencies, local_queries, local_statuses = [], [], Counter()
+        for job in chunk:
+            start = time.perf_counter()
+            status, count = send(*job)
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] += 1
+            if count is not None:
+                local_queries.append(count)
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target = worker, args = (jobs[i::concurrency],)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, queries, statuses, time.perf_counter() - start
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Percentil com interpolação linear (como ``numpy.percentile``) de uma lista ordenada."""
+
+    position = q / 100 * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _summarize_run(latencies: list[float], queries: list[int], statuses: Counter, elapsed: float) -> dict:
+
+    ordered = sorted(latency * 1000 for latency in latencies)
+    return {
+        'requests': len(ordered),
+        'errors': sum(count for status, count in statuses.items() if not 200 <= status < 400),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(ordered) / len(ordered), 3),
+            **{f'p{q}': round(_percentile(ordered, q), 3) for q in (50, 90, 99)},
+            'max': round(ordered[-1], 3)
+        },
+        'queries': round(sum(queries) / len(queries), 2) if queries else None
+    }
+
+
+def _dataset() -> dict:
+    """Tamanho do banco, gravado junto com os resultados para comparar execuções equivalentes."""
+
+    return {
+        model.__tablename__: db.session.scalar(select(func.count()).select_from(model))
+        for model in (Player, Battle, Boss, Phase, PhaseProgress, Item, Insignia, PlayerInsignia)
+    }
+
+
+def _compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Imprime a diferença contra ``baseline`` e retorna as regressões encontradas."""
+
+    def change(new: float | None, old: float | None) -> str:
+        if new is None or old is None:
+            return f'{"-":>18}'
+        ratio = f'{(new - old) / old:+.0%}' if old else ''
+        return f'{old:8.2f} → {new:8.2f} {ratio:>5}'
+
+    if baseline.get('dataset') != results['dataset']:
+        click.echo('Aviso: o baseline foi medido com outro volume de dados:')
+        click.echo(f"  baseline {baseline.get('dataset')}")
+        click.echo(f"  atual    {results['dataset']}")
+
+    regressions = []
+    for target, scenarios in results['targets'].items():
+        old_scenarios = baseline.get('targets', {}).get(target)
+        if not old_scenarios:
+            continue
+
+        click.echo(f'\n[{target}] comparação com o baseline')
+        click.echo(f'{"rota":<16} {"p50 (ms)":>26} {"p99 (ms)":>26} {"req/s":>26} {"consultas":>26}')
+        for name, new in scenarios.items():
+            old = old_scenarios.get(name)
+            if old is None:
+                continue
+
+            click.echo(
+                f"{name:<16} {change(new['latency_ms']['p50'], old['latency_ms']['p50']):>26} "
+                f"{change(new['latency_ms']['p99'], old['latency_ms']['p99']):>26} "
+                f"{change(new['throughput'], old['throughput']):>26} {change(new['queries'], old['queries']):>26}"
+            )
+            # O p99 de poucas centenas de requisições oscila demais entre execuções: só aparece na tabela
+            if new['latency_ms']['p50'] > old['latency_ms']['p50'] * (1 + threshold):
+                regressions.append(f'{target}/{name}: p50 {old["latency_ms"]["p50"]} → {new["latency_ms"]["p50"]} ms')
+            if new['throughput'] and old['throughput'] and new['throughput'] < old['throughput'] / (1 + threshold):
+                regressions.append(f'{target}/{name}: vazão {old["throughput"]} → {new["throughput"]} req/s')
+            # A média de consultas varia um pouco com os dados gravados pelas próprias rotas de
+            # escrita; uma consulta a mais por requisição (um N+1, por exemplo) passa de 0.5
+            if new['queries'] is not None and old['queries'] is not None and new['queries'] - old['queries'] >= 0.5:
+                regressions.append(f'{target}/{name}: consultas {old["queries"]} → {new["queries"]}')
+            if new['errors'] > old['errors']:
+                regressions.append(f'{target}/{name}: erros {old["errors"]} → {new["errors"]}')
+    return regressions
+
+
+@bench_cli.command('run')
+@click.option('--target', 'targets', multiple = True, type = click.Choice(['client', 'server']), default = ('client', 'server'),
+              show_default = True, help = 'Test client do Flask e/ou servidor WSGI real (repetível).')
+@click.option('--url', help = 'Mede um servidor já em execução (ex.: gunicorn) em vez de subir o servidor do werkzeug.')
+@click.option('--scenario', 'selected', multiple = True, type = click.Choice(SCENARIO_NAMES), help = 'Rotas a medir (padrão: todas).')
+@click.option('--requests', 'count', default = 200, show_default = True, help = 'Requisições medidas por rota.')
+@click.option('--warmup', default = 20, show_default = True, help = 'Requisições descartadas antes de medir cada rota.')
+@click.option('--concurrency', default = 4, show_default = True, help = 'Conexões simultâneas contra o servidor.')
+@click.option('--players', 'sample_size', default = 1000, show_default = True, help = 'Jogadores sorteados para as requisições.')
+@click.option('--password', default = '123', show_default = True, help = "Senha dos jogadores (a do 'flask seed-large').")
+@click.option('--seed', default = 42, show_default = True)
+@click.option('--output', type = click.Path(dir_okay = False), help = 'Grava os resultados em JSON.')
+@click.option('--baseline', type = click.Path(exists = True, dir_okay = False), help = 'JSON de uma execução anterior para comparar.')
+@click.option('--threshold', default = 0.2, show_default = True, help = 'Piora relativa do p50 ou da vazão considerada regressão.')
+@click.option('--fail-on-regression', is_flag = True, help = 'Termina com erro se houver regressão em relação ao baseline.')
+def bench_run(targets: tuple[str, ...], url: str | None, selected: tuple[str, ...], count: int, warmup: int, concurrency: int,
+              sample_size: int, password: str, seed: int, output: str | None, baseline: str | None, threshold: float,
+              fail_on_regression: bool):
+    """
+    Suite de benchmarks das rotas críticas sobre o banco configurado
+    (gere um com 'flask seed-large'). Mede vazão, percentis de latência e
+    consultas SQL por requisição de cada rota. As rotas de escrita gravam
+    batalhas e fases de verdade, então use um banco descartável.
+
+    As requisições de cada rota são sorteadas a partir de ``--seed``, então
+    duas execuções sobre o mesmo banco enviam exatamente as mesmas.
+    """
+
+    app = current_app._get_current_object()
+    if url:
+        targets = ('server',)
+
+    rng = random.Random(seed)
+    player_ids = db.session.scalars(select(Player.id).order_by(Player.id)).all()
+    admin = db.session.scalars(select(Player).filter_by(role = 'admin').order_by(Player.id).limit(1)).first()
+    if not player_ids or admin is None:
+        raise click.ClickException("O banco precisa de jogadores e de um administrador; rode 'flask seed-large' antes.")
+
+    sample = rng.sample(player_ids, min(sample_size, len(player_ids)))
+    players = [
+        (player.id, player.username, {'x-access-token': auth.issue_token(player)})
+        for player in db.session.scalars(select(Player).where(Player.id.in_(sample)).order_by(Player.id))
+    ]
+    boss_ids = db.session.scalars(select(Boss.id).order_by(Boss.id)).all()
+    phase_ids = db.session.scalars(select(Phase.id).order_by(Phase.id)).all()
+    scenarios = _scenarios(players, {'x-access-token': auth.issue_token(admin)}, boss_ids, phase_ids, password)
+    if selected:
+        scenarios = [scenario for scenario in scenarios if scenario.name in selected]
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec = 'seconds'),
+        'options': {'requests': count, 'warmup': warmup, 'concurrency': concurrency, 'players': len(players), 'seed': seed},
+        'dataset': _dataset(),
+        'targets': {}
+    }
+    # Libera o banco (o SQLite bloqueia escritores enquanto há uma transação aberta)
+    db.session.rollback()
+
+    headers_enabled = app.config['QUERY_PROFILE_HEADERS']
+    app.config['QUERY_PROFILE_HEADERS'] = True
+    # Log de acesso do werkzeug e de requisições lentas poluiriam a tabela
+    loggers = {name: logging.getLogger(name) for name in ('werkzeug', 'app.slow_requests')}
+    levels = {name: logger.level for name, logger in loggers.items()}
+    for logger in loggers.values():
+        logger.setLevel(logging.ERROR)
+    server = None
+    try:
+        for target in targets:
+            if target == 'client':
+                make_sender, workers = _client_sender(app), 1
+            else:
+                if url is None:
+                    # Servidor real do werkzeug, com uma thread por conexão, em uma porta livre
+                    server = make_server('127.0.0.1', 0, app, threaded = True)
+                    threading.Thread(target = server.serve_forever, daemon = True).start()
+                make_sender, workers = _http_sender(url or f'http://127.0.0.1:{server.server_port}'), concurrency
+
+            click.echo(f'\n[{target}] {count} requisições por rota, {workers} conexão(ões)')
+            click.echo(f'{"rota":<16} {"req/s":>9} {"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"max ms":>9} {"consultas":>10} {"erros":>6}')
+            scores = results['targets'][target] = {}
+            for scenario in scenarios:
+                # Mesma sequência de requisições em qualquer alvo e em qualquer execução
+                scenario_rng = random.Random(f'{seed}-{scenario.name}')
+                jobs = [scenario.build(scenario_rng) for _ in range(warmup + count)]
+                _measure(make_sender, jobs[:warmup], workers)
+                score = scores[scenario.name] = _summarize_run(*_measure(make_sender, jobs[warmup:], workers))
+
+                latency = score['latency_ms']
+                queries = '-' if score['queries'] is None else f"{score['queries']:.1f}"
+                click.echo(
+                    f"{scenario.name:<16} {score['throughput']:>9.1f} {latency['p50']:>9.2f} {latency['p90']:>9.2f} "
+                    f"{latency['p99']:>9.2f} {latency['max']:>9.2f} {queries:>10} {score['errors']:>6}"
+                )
+    finally:
+        if server is not None:
+            server.shutdown()
+        for name, logger in loggers.items():
+            logger.setLevel(levels[name])
+        app.config['QUERY_PROFILE_HEADERS'] = headers_enabled
+
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent = 2)
+        click.echo(f'\nResultados gravados em {output}')
+
+    if baseline:
+        with open(baseline) as file:
+            regressions = _compare(results, json.load(file), threshold)
+        if regressions:
+            click.echo('\nRegressões:')
+            for regression in regressions:
+                click.echo(f'  {regression}')
+            if fail_on_regression:
+                raise click.ClickException(f'{len(regressions)} regressão(ões) em relação a {baseline}')
+        else:
+            click.echo('\nNenhuma regressão em relação ao baseline.')
@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_right
+from typing import Callable, NamedTuple
+from flask import Response, current_app, g, request
+from sqlalchemy import select
+from .db import db, dialect_insert
+from .http_cache import not_modified, set_cache_headers
+from .models import CatalogVersion
+from .pagination import decode_cursor, encode_cursor, page_limit
+
+
+class CatalogEntry(NamedTuple):
+    version: int
+    ids: list[int]
+    rows: list[dict]
+    payloads: dict
+
+
+class Catalog(NamedTuple):
+    key: object
+    load: Callable[[], list[dict]]
+    build: Callable[[list[dict], str | None], object]
+
+
+class CatalogCache:
+    """
+    Cache de leitura dos catálogos (bosses, itens, fases e conquistas).
+
+    Cada catálogo é guardado já serializado e associado a um número de
+    versão gravado na tabela ``catalog_version``. As rotas de CRUD chamam
+    ``bump`` na mesma transação da alteração; como a versão fica no banco,
+    todos os workers percebem a mudança na requisição seguinte ao conferir a
+    versão (uma consulta de poucas linhas por requisição, feita só quando um
+    catálogo é lido).
+    """
+
+    # Quantas combinações de cursor/limite serializadas manter por catálogo
+    MAX_PAYLOADS = 32
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._catalogs: dict[str, Catalog] = {}
+        self._entries: dict[str, CatalogEntry] = {}
+
+    def register(self, name: str, key, load: Callable[[], list[dict]], build: Callable[[list[dict], str | None], object]) -> None:
+        """
+        Registra um catálogo. ``load`` retorna as linhas já serializadas e
+        ordenadas por ``key`` (a coluna id); ``build`` monta o corpo da resposta
+        a partir de uma página de linhas e do cursor da próxima página.
+        """
+        self._catalogs[name] = Catalog(key, load, build)
+
+    def versions(self) -> dict[str, int]:
+        """Versões atuais de todos os catálogos, consultadas no máximo uma vez por requisição."""
+
+        if 'catalog_versions' not in g:
+            g.catalog_versions = dict(db.session.execute(select(CatalogVersion.name, CatalogVersion.version)).all())
+        return g.catalog_versions
+
+    def version(self, name: str) -> int:
+        return self.versions().get(name, 0)
+
+    def bump(self, *names: str) -> None:
+        """Invalida os catálogos em todos os workers. Deve ser chamada antes do commit."""
+
+        # Upsert: dois workers criando a mesma linha ao mesmo tempo não colidem na chave
+        for name in names:
+            statement = dialect_insert(CatalogVersion).values(name = name, version = 1)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements = [CatalogVersion.name],
+                set_ = {'version': CatalogVersion.version + 1}
+            ))
+        g.pop('catalog_versions', None)
+
+    def entry(self, name: str) -> CatalogEntry:
+
+        version = self.version(name)
+        entry = self._entries.get(name)
+        if entry is not None and entry.version == version:
+            return entry
+
+        rows = self._catalogs[name].load()
+        entry = CatalogEntry(version, [row['id'] for row in rows], rows, {})
+        with self._lock:
+            self._entries[name] = entry
+        return entry
+
+    def response(self, name: str) -> Response:
+        """
+        Responde a listagem do catálogo a partir do cache, respeitando
+        ``?limit=`` e ``?cursor=`` como a paginação por chave das demais rotas.
+
+        O ETag é derivado da versão do catálogo, então um ``If-None-Match``
+        atual recebe 304 sem carregar nem serializar nenhuma linha.
+        """
+
+        catalog = self._catalogs[name]
+        limit = page_limit()
+        cursor = request.args.get('cursor')
+
+        etag = f'{name}-{self.version(name)}-{limit}-{cursor or ""}'
+        cache_control = f"public, max-age={current_app.config['CATALOG_CACHE_MAX_AGE']}"
+        response = not_modified(etag, cache_control)
+        if response is not None:
+            return response
+
+        entry = self.entry(name)
+
+        cached = entry.payloads.get((cursor, limit))
+        if cached is None:
+            start = 0
+            if cursor:
+                start = bisect_right(entry.ids, decode_cursor(cursor, (catalog.key,))[0])
+
+            rows = entry.rows[start:start + limit]
+            next_cursor = encode_cursor([rows[-1]['id']]) if start + limit < len(entry.rows) else None
+            body = current_app.json.response(catalog.build(rows, next_cursor)).get_data()
+            cached = (body, next_cursor)
+
+            with self._lock:
+                if len(entry.payloads) >= self.MAX_PAYLOADS:
+                    entry.payloads.clear()
+                entry.payloads[(cursor, limit)] = cached
+
+        body, next_cursor = cached
+        response = Response(body, mimetype = current_app.json.mimetype)
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return set_cache_headers(response, etag, cache_control)
+
+
+catalog = CatalogCache()
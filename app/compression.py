@@ -0,0 +1,144 @@
+import zlib
+from typing import Iterable, Iterator
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _Gzip:
+
+    def __init__(self, level: int) -> None:
+        # wbits 31: formato gzip (cabeçalho e CRC) em vez de zlib puro
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality = level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level = level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS = {'gzip': _Gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = _Brotli
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _Zstd
+
+
+def strip_encoding(etag: str) -> str:
+    """Remove o sufixo de codificação que ``compress_response`` acrescenta ao ETag."""
+
+    base, _, encoding = etag.rpartition('-')
+    return base if base and encoding in COMPRESSORS else etag
+
+
+def _stream(chunks: Iterable[bytes | str], compressor) -> Iterator[bytes]:
+    """Comprime um corpo transmitido pedaço a pedaço, sem esperar o fim da resposta."""
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk)
+            if chunk:
+                # Libera o que já foi comprimido para o cliente receber cada pedaço
+                data += compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response: Response, config) -> Response:
+    """
+    Comprime a resposta com a melhor codificação aceita pelo cliente
+    (``Accept-Encoding``) entre as de ``COMPRESSION_ALGORITHMS`` instaladas.
+
+    Respostas menores que ``COMPRESSION_MIN_SIZE`` vão sem compressão;
+    respostas transmitidas (``?stream=``) são sempre comprimidas, pedaço a
+    pedaço. O ETag ganha o sufixo ``-<codificação>``, já que o corpo
+    comprimido é outra representação.
+    """
+
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in config['COMPRESSION_MIMETYPES']
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    if not response.is_streamed and response.content_length is not None \
+            and response.content_length < config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    algorithms = [name for name in config['COMPRESSION_ALGORITHMS'] if name in COMPRESSORS]
+    encoding = request.accept_encodings.best_match(algorithms)
+    if encoding is None:
+        return response
+
+    compressor = COMPRESSORS[encoding](config['COMPRESSION_LEVELS'][encoding])
+    if response.is_streamed:
+        response.response = _stream(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compressor.compress(response.get_data()) + compressor.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_compression(app: Flask) -> None:
+
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response, app.config)
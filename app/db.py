@@ -1,4 +1,156 @@
+import heapq
+import json
+import logging
+import time
+from flask import Flask, Response, current_app, g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Engine, event
+from sqlalchemy.dialects import postgresql, sqlite
 
 
 db = SQLAlchemy()
+
+slow_request_logger = logging.getLogger('app.slow_requests')
+
+
+def dialect_insert(model):
+    """``INSERT`` do dialeto em uso, que aceita ``on_conflict_do_update`` (upsert)."""
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def init_storage_profile(app: Flask) -> None:
+    """
+    Mescla as opções de engine do perfil ``STORAGE_PROFILE`` em
+    ``SQLALCHEMY_ENGINE_OPTIONS``. Deve ser chamada antes de ``db.init_app``;
+    os PRAGMAs são aplicados depois, por ``init_sqlite_pragmas``.
+    """
+
+    profile = get_storage_profile(app)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite') and ':memory:' not in app.config['SQLALCHEMY_DATABASE_URI']:
+        options = dict(profile['engine_options'])
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_sqlite_pragmas(app: Flask) -> None:
+
+    pragmas = get_storage_profile(app)['pragmas']
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite(engine, pragmas)
+
+
+def get_storage_profile(app: Flask) -> dict:
+
+    name = app.config['STORAGE_PROFILE']
+    try:
+        return app.config['STORAGE_PROFILES'][name]
+    except KeyError:
+        raise RuntimeError(f'Unknown storage profile: {name}') from None
+
+
+def configure_sqlite(engine: Engine, pragmas: dict) -> None:
+    """Aplica ``pragmas`` a cada nova conexão do engine, se ele for SQLite."""
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def init_query_profiler(app: Flask) -> None:
+    """
+    Mede as consultas SQL de cada requisição: quantidade, tempo total no
+    banco e as ``QUERY_PROFILE_TOP`` consultas mais lentas.
+
+    Em modo de debug ou de testes (ou com ``QUERY_PROFILE_HEADERS``) os totais vão nos cabeçalhos
+    ``X-Query-Count``, ``X-Query-Time`` (ms) e ``Server-Timing``. Requisições
+    acima de ``SLOW_REQUEST_THRESHOLD_MS`` ou de ``SLOW_REQUEST_QUERY_COUNT``
+    consultas são registradas como JSON no logger ``app.slow_requests``.
+    """
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _start_query)
+            event.listen(engine, 'after_cursor_execute', _end_query)
+
+    @app.before_request
+    def start_request_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def report_queries(response: Response) -> Response:
+
+        profile = get_query_profile()
+        if app.debug or app.testing or app.config['QUERY_PROFILE_HEADERS']:
+            response.headers['X-Query-Count'] = str(profile['count'])
+            response.headers['X-Query-Time'] = f"{profile['time_ms']:.2f}"
+            response.headers.add('Server-Timing', f'db;dur={profile["time_ms"]:.2f};desc="{profile["count"]} queries"')
+
+        started = g.get('request_started')
+        duration_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        if duration_ms >= app.config['SLOW_REQUEST_THRESHOLD_MS'] or profile['count'] >= app.config['SLOW_REQUEST_QUERY_COUNT']:
+            slow_request_logger.warning(json.dumps({
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'path': request.path,
+                'view_args': request.view_args,
+                'args': request.args.to_dict(flat = False),
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                **profile
+            }, default = str))
+        return response
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+
+    if not has_request_context():
+        return
+
+    started = getattr(context, '_query_started', None)
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    g.query_count = g.get('query_count', 0) + 1
+    g.query_time = g.get('query_time', 0.0) + elapsed
+
+    # Heap mínimo com as consultas mais lentas da requisição
+    slowest = g.setdefault('slowest_queries', [])
+    item = (elapsed, g.query_count, statement)
+    if len(slowest) < current_app.config['QUERY_PROFILE_TOP']:
+        heapq.heappush(slowest, item)
+    elif elapsed > slowest[0][0]:
+        heapq.heapreplace(slowest, item)
+
+
+def get_query_count() -> int:
+    """Retorna quantas consultas SQL a requisição atual já executou."""
+    return g.get('query_count', 0)
+
+
+def get_query_profile() -> dict:
+    """Quantidade, tempo total (ms) e consultas mais lentas da requisição atual."""
+
+    return {
+        'count': get_query_count(),
+        'time_ms': round(g.get('query_time', 0.0) * 1000, 3),
+        'slowest': [
+            {'statement': ' '.join(statement.split())[:500], 'time_ms': round(elapsed * 1000, 3)}
+            for elapsed, _, statement in sorted(g.get('slowest_queries', []), reverse = True)
+        ]
+    }
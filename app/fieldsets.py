@@ -0,0 +1,48 @@
+from typing import NamedTuple
+from flask import abort, request
+from sqlalchemy.orm import Query
+from .models import SparseSerializer
+
+
+class FieldSet(NamedTuple):
+    fields: tuple[str, ...] | None
+    expand: frozenset[str]
+
+
+def _split(name: str) -> list[str]:
+    value = request.args.get(name)
+    return [part.strip() for part in value.split(',') if part.strip()] if value else []
+
+
+def parse_fieldset(model: type[SparseSerializer]) -> FieldSet | None:
+    """
+    Lê ``?fields=`` e ``?expand=`` da requisição. Retorna ``None`` quando
+    nenhum dos dois foi informado, caso em que a rota mantém o formato
+    completo de ``to_dict()``.
+    """
+
+    if 'fields' not in request.args and 'expand' not in request.args:
+        return None
+
+    fields = _split('fields')
+    expand = _split('expand')
+
+    invalid = [name for name in fields if name not in model.__public_fields__]
+    invalid += [name for name in expand if name not in model.__expandable__]
+    if invalid:
+        abort(400, description = f"Campos inválidos: {', '.join(invalid)}")
+
+    return FieldSet(tuple(fields) or None, frozenset(expand))
+
+
+def apply_fieldset(query: Query, model: type[SparseSerializer], fieldset: FieldSet, *required) -> Query:
+    """Restringe a consulta às colunas pedidas e carrega as relações expandidas."""
+    return query.options(*model.sparse_options(fieldset.fields, fieldset.expand, *required))
+
+
+def serializer(model: type[SparseSerializer], fieldset: FieldSet | None):
+    """Função de serialização para as linhas da consulta, esparsa ou completa."""
+
+    if fieldset is None:
+        return model.to_dict
+    return lambda row: row.to_sparse_dict(fieldset.fields, fieldset.expand)
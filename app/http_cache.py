@@ -0,0 +1,30 @@
+from flask import Response, request
+from .compression import strip_encoding
+
+
+def not_modified(etag: str, cache_control: str) -> Response | None:
+    """
+    Retorna uma resposta 304 se o cliente já tem a versão ``etag``
+    (``If-None-Match``), antes de qualquer serialização.
+
+    ETags de respostas comprimidas (``<etag>-gzip``) também valem.
+    """
+
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        matched = etag
+    else:
+        matched = next((tag for tag in if_none_match.as_set() if strip_encoding(tag) == etag), None)
+        if matched is None:
+            return None
+
+    # Devolve o ETag da representação que o cliente tem (com o sufixo, se houver)
+    response = Response(status = 304)
+    response.vary.add('Accept-Encoding')
+    return set_cache_headers(response, matched, cache_control)
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> Response:
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
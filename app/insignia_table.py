@@ -0,0 +1,62 @@
+import threading
+from bisect import bisect_left, bisect_right
+from .catalog import catalog
+from .db import db
+from .models import Insignia
+
+
+class InsigniaTable:
+    """
+    Cache das conquistas ordenadas por ``xp_required``.
+
+    Permite encontrar, com busca binária, as conquistas cujo requisito de XP
+    foi atingido entre a experiência antiga e a nova de um jogador, sem
+    consultar a tabela ``insignia`` a cada recompensa. A cópia é associada à
+    versão do catálogo ``insignias``, que as rotas de CRUD incrementam, então
+    todos os workers recarregam a tabela na primeira recompensa após uma
+    alteração. Conquistas criadas ou facilitadas abaixo do XP atual de um
+    jogador são concedidas pelas próprias rotas (``backfill_insignia``).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thresholds: list[int] = []
+        self._insignias: list[tuple[int, int]] = []
+        self._version: int | None = None
+
+    def _ensure_loaded(self) -> None:
+
+        version = catalog.version('insignias')
+        if self._version == version:
+            return
+
+        rows = db.session.query(Insignia.xp_required, Insignia.id, Insignia.reward_coins)\
+            .order_by(Insignia.xp_required, Insignia.id)\
+            .all()
+
+        with self._lock:
+            self._thresholds = [xp_required or 0 for xp_required, _, _ in rows]
+            self._insignias = [(insignia_id, reward_coins or 0) for _, insignia_id, reward_coins in rows]
+            self._version = version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def crossed(self, old_experience: int, new_experience: int) -> list[tuple[int, int]]:
+        """
+        Retorna ``(insignia_id, reward_coins)`` das conquistas com requisito de XP
+        entre ``old_experience`` e ``new_experience`` (inclusive).
+        """
+
+        if new_experience <= old_experience:
+            return []
+
+        self._ensure_loaded()
+        with self._lock:
+            start = bisect_left(self._thresholds, old_experience)
+            end = bisect_right(self._thresholds, new_experience)
+            return self._insignias[start:end]
+
+
+insignia_table = InsigniaTable()
@@ -0,0 +1,72 @@
+import enum
+import json
+from datetime import date
+from typing import Any
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provedor JSON que usa o ``orjson`` quando ele está instalado e cai para o
+    ``json`` da biblioteca padrão caso contrário.
+
+    Datas são serializadas em ISO 8601 e enums (como ``ResultType``) pelo seu
+    valor, nativamente no ``orjson`` ou pelo ``default`` no fallback; assim os
+    ``to_dict()`` dos modelos podem devolver os objetos sem convertê-los linha
+    a linha.
+
+    As respostas não são idênticas byte a byte às do provedor padrão: o
+    ``orjson`` grava caracteres não ASCII em UTF-8 (``"ç"``), enquanto o
+    ``json`` com ``ensure_ascii`` (usado no fallback) grava escapes
+    (``"\\u00e7"``). O documento é o mesmo após o parse, mas checksums do
+    corpo e o tamanho comprimido de respostas com nomes acentuados mudam
+    conforme o ``orjson`` esteja ou não instalado.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        super().__init__(app)
+        self.use_orjson = orjson is not None
+
+    @staticmethod
+    def default(obj: Any) -> Any:
+        if isinstance(obj, date):
+            return obj.isoformat()
+        if isinstance(obj, enum.Enum):
+            return obj.value
+        return DefaultJSONProvider.default(obj)
+
+    def _orjson_options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default = self.default, option = self._orjson_options()).decode()
+
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.use_orjson and not (self.compact is False or (self.compact is None and self._app.debug)):
+            data = orjson.dumps(obj, default = self.default, option = self._orjson_options())
+            return self._app.response_class(data + b'\n', mimetype = self.mimetype)
+        return super().response(obj)
@@ -0,0 +1,133 @@
+import time
+import threading
+from flask import current_app
+from sortedcontainers import SortedList
+from .db import db
+from .models import Player
+
+
+class Leaderboard:
+    """
+    Índice em memória do ranking de jogadores, ordenado por experiência.
+
+    O índice é carregado do banco na primeira consulta (e novamente após
+    ``LEADERBOARD_TTL`` segundos, para absorver alterações feitas por outros
+    workers) e depois é mantido incrementalmente pelas rotas que alteram
+    ``Player.experience``. Alterações feitas durante uma recarga são
+    reaplicadas sobre o resultado da consulta antes da troca do índice.
+    Consultas de rank e de páginas custam O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._entries: SortedList = SortedList()
+        self._players: dict[int, tuple[int, str]] = {}
+        self._loaded_at: float | None = None
+        # Alterações feitas enquanto o índice é recarregado (None = remoção)
+        self._pending: dict[int, tuple[int, str] | None] | None = None
+
+    @staticmethod
+    def _key(player_id: int, experience: int) -> tuple[int, int]:
+        return (-experience, player_id)
+
+    def _ensure_loaded(self) -> None:
+
+        ttl = current_app.config.get('LEADERBOARD_TTL')
+        if self._loaded_at is not None and (ttl is None or time.monotonic() - self._loaded_at < ttl):
+            return
+
+        # Só uma thread recarrega; as demais seguem com o índice atual, se houver
+        if not self._reload_lock.acquire(blocking = self._loaded_at is None):
+            return
+        try:
+            # Outra thread pode ter acabado de recarregar
+            if self._loaded_at is not None and (ttl is None or time.monotonic() - self._loaded_at < ttl):
+                return
+
+            with self._lock:
+                self._pending = {}
+
+            rows = db.session.query(Player.id, Player.username, Player.experience).all()
+            players = {player_id: (experience or 0, username) for player_id, username, experience in rows}
+
+            with self._lock:
+                # Reaplica o que mudou entre a consulta e a troca do índice
+                for player_id, value in self._pending.items():
+                    if value is None:
+                        players.pop(player_id, None)
+                    else:
+                        players[player_id] = value
+                self._pending = None
+                self._players = players
+                self._entries = SortedList(self._key(player_id, experience) for player_id, (experience, _) in players.items())
+                self._loaded_at = time.monotonic()
+        finally:
+            self._reload_lock.release()
+
+    def _entry(self, rank: int, key: tuple[int, int]) -> dict:
+        player_id = key[1]
+        experience, username = self._players[player_id]
+        return {
+            'rank': rank,
+            'id': player_id,
+            'username': username,
+            'experience': experience
+        }
+
+    def update(self, player: Player) -> None:
+        """Insere ou reposiciona o jogador no índice, se ele já estiver carregado."""
+        self.set(player.id, player.username, player.experience)
+
+    def set(self, player_id: int, username: str, experience: int | None) -> None:
+
+        experience = experience or 0
+        with self._lock:
+            if self._pending is not None:
+                self._pending[player_id] = (experience, username)
+            if self._loaded_at is None:
+                return
+
+            old = self._players.get(player_id)
+            if old is not None:
+                self._entries.discard(self._key(player_id, old[0]))
+            self._players[player_id] = (experience, username)
+            self._entries.add(self._key(player_id, experience))
+
+    def remove(self, player_id: int) -> None:
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending[player_id] = None
+            old = self._players.pop(player_id, None)
+            if old is not None:
+                self._entries.discard(self._key(player_id, old[0]))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def page(self, offset: int, limit: int) -> list[dict]:
+        """Retorna ``limit`` posições do ranking a partir de ``offset``."""
+
+        self._ensure_loaded()
+        with self._lock:
+            keys = self._entries[offset:offset + limit]
+            return [self._entry(offset + index + 1, key) for index, key in enumerate(keys)]
+
+    def around(self, player_id: int, radius: int) -> tuple[int, list[dict]] | None:
+        """Retorna o rank do jogador e até ``radius`` vizinhos acima e abaixo dele."""
+
+        self._ensure_loaded()
+        with self._lock:
+            player = self._players.get(player_id)
+            if player is None:
+                return None
+
+            position = self._entries.index(self._key(player_id, player[0]))
+            start = max(position - radius, 0)
+            keys = self._entries[start:position + radius + 1]
+            return position + 1, [self._entry(start + index + 1, key) for index, key in enumerate(keys)]
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,341 @@
+import fcntl
+import glob
+import hmac
+import mmap
+import os
+import threading
+import time
+import weakref
+import zlib
+from array import array
+from bisect import bisect_left
+from flask import Flask, Response, abort, g, request
+from .db import db
+from .passwords import passwords
+
+
+# Campos de cada rota no arquivo: requisições, erros 5xx, erros 4xx, soma das latências
+REQUESTS, SERVER_ERRORS, CLIENT_ERRORS, LATENCY_SUM, BUCKETS = range(5)
+
+GAUGES = ('db_pool_size', 'db_pool_checked_out', 'db_pool_overflow', 'password_queue_depth')
+
+# Cabeçalho: pid, hash do layout, momento da última escrita dos gauges
+HEADER = 3
+
+UNMATCHED = '<unmatched>'
+
+# Contadores somados dos processos que já terminaram
+ARCHIVE = 'archive.metrics'
+
+
+class MetricsStore:
+    """
+    Métricas de requisições compartilhadas entre os workers do gunicorn.
+
+    Cada thread de cada processo escreve em um arquivo próprio em
+    ``METRICS_DIR``, mapeado em memória como um vetor de doubles com posições
+    fixas por rota, então registrar uma requisição é só somar em algumas
+    posições, sem locks e sem criar objetos de rótulo. Quando a thread
+    termina, o arquivo volta para uma lista do processo e é reaproveitado
+    pela próxima thread (o servidor de desenvolvimento cria uma por
+    requisição).
+
+    O ``/metrics`` lê e soma todos os arquivos; gauges (pool do banco e fila
+    de hashes) só contam para processos ainda vivos. Os arquivos de processos
+    que já terminaram são somados a ``archive.metrics`` e apagados, então o
+    diretório não cresce a cada worker reiniciado e os contadores não voltam.
+
+    Arquivos de um layout diferente (outro conjunto de rotas ou de faixas do
+    histograma) são ignorados; ainda assim, o diretório deve ser limpo a cada
+    deploy.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._free: list[memoryview] = []
+        self._files = 0
+        self._offsets: dict[str, int] = {}
+        self._endpoints: list[str] = []
+        self._bounds: list[float] = []
+        self._directory = ''
+        self._layout = 0
+        self._size = 0
+
+    @property
+    def _block(self) -> int:
+        return BUCKETS + len(self._bounds) + 1
+
+    def configure(self, directory: str, endpoints: list[str], bounds: list[float]) -> None:
+
+        # Arquivos abertos com outro layout não servem mais
+        self._local = threading.local()
+        self._pid = None
+        self._directory = directory
+        self._bounds = sorted(bounds)
+        self._endpoints = sorted(endpoints) + [UNMATCHED]
+        start = HEADER + len(GAUGES)
+        self._offsets = {endpoint: start + i * self._block for i, endpoint in enumerate(self._endpoints)}
+        self._size = start + len(self._endpoints) * self._block
+        self._layout = zlib.crc32(repr((self._endpoints, self._bounds, GAUGES)).encode())
+        os.makedirs(directory, exist_ok = True)
+
+    def _view(self) -> memoryview:
+        """Vetor da thread atual. O lock só é usado na primeira requisição de cada thread."""
+
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) == pid:
+            return local.view
+
+        with self._lock:
+            if self._pid != pid:
+                # Após um fork os arquivos do processo pai não são deste worker
+                self._pid, self._free, self._files = pid, [], 0
+            if self._free:
+                view = self._free.pop()
+            else:
+                view = self._create(pid)
+
+        local.view = view
+        local.pid = pid
+        # Devolve o arquivo à lista quando o estado local da thread for descartado
+        local.lease = lease = _Lease()
+        weakref.finalize(lease, self._release, pid, view)
+        return view
+
+    def _create(self, pid: int) -> memoryview:
+
+        self._files += 1
+        path = os.path.join(self._directory, f'{pid}-{self._files}.metrics')
+        with open(path, 'w+b') as file:
+            file.truncate(self._size * 8)
+            view = memoryview(mmap.mmap(file.fileno(), self._size * 8)).cast('d')
+        view[0] = pid
+        view[1] = self._layout
+        return view
+
+    def _release(self, pid: int, view: memoryview) -> None:
+        with self._lock:
+            if self._pid == pid:
+                self._free.append(view)
+
+    def observe(self, endpoint: str | None, status: int, seconds: float) -> None:
+
+        view = self._view()
+        base = self._offsets.get(endpoint) or self._offsets[UNMATCHED]
+        view[base + REQUESTS] += 1
+        if status >= 500:
+            view[base + SERVER_ERRORS] += 1
+        elif status >= 400:
+            view[base + CLIENT_ERRORS] += 1
+        view[base + LATENCY_SUM] += seconds
+        view[base + BUCKETS + bisect_left(self._bounds, seconds)] += 1
+
+    def set_gauges(self, *values: float) -> None:
+
+        view = self._view()
+        for i, value in enumerate(values, HEADER):
+            view[i] = value
+        view[2] = time.time()
+
+    def _read(self, path: str) -> array | None:
+
+        try:
+            with open(path, 'rb') as file:
+                values = array('d', file.read())
+        except OSError:
+            return None
+        if len(values) != self._size or values[1] != self._layout:
+            return None
+        return values
+
+    def _archive_dead(self) -> None:
+        """Soma os contadores dos arquivos de processos encerrados em ``archive.metrics`` e os apaga."""
+
+        dead = [
+            path for path in glob.glob(os.path.join(self._directory, '*-*.metrics'))
+            if not _alive(int(os.path.basename(path).split('-', 1)[0]))
+        ]
+        if not dead:
+            return
+
+        archive_path = os.path.join(self._directory, ARCHIVE)
+        archive = self._read(archive_path)
+        if archive is None:
+            archive = array('d', bytes(self._size * 8))
+            archive[1] = self._layout
+        for path in dead:
+            values = self._read(path)
+            if values is not None:
+                for i in range(HEADER + len(GAUGES), self._size):
+                    archive[i] += values[i]
+
+        temporary = f'{archive_path}.{os.getpid()}'
+        with open(temporary, 'wb') as file:
+            archive.tofile(file)
+        os.replace(temporary, archive_path)
+        for path in dead:
+            os.remove(path)
+
+    def collect(self) -> tuple[array, dict[str, float]]:
+        """Soma os contadores de todos os arquivos e os gauges do arquivo mais recente de cada processo vivo."""
+
+        totals = array('d', bytes(self._size * 8))
+        latest: dict[int, tuple[float, array]] = {}
+        with open(os.path.join(self._directory, '.lock'), 'a') as lock:
+            # Um arquivo sendo arquivado por outro worker não pode ser contado duas vezes
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._archive_dead()
+            for path in glob.glob(os.path.join(self._directory, '*.metrics')):
+                values = self._read(path)
+                if values is None:
+                    continue
+
+                for i in range(HEADER + len(GAUGES), self._size):
+                    totals[i] += values[i]
+
+                pid = int(values[0])
+                if pid and values[2] >= latest.get(pid, (-1.0,))[0]:
+                    latest[pid] = (values[2], values[HEADER:HEADER + len(GAUGES)])
+
+        gauges = dict.fromkeys(GAUGES, 0.0)
+        for _, values in latest.values():
+            for name, value in zip(GAUGES, values):
+                gauges[name] += value
+        return totals, gauges
+
+    def _quantile(self, q: float, buckets: list[float], count: float) -> float:
+        """Estima o quantil pelo histograma, interpolando dentro da faixa (como ``histogram_quantile``)."""
+
+        rank = q * count
+        cumulative = 0.0
+        for i, bucket in enumerate(buckets):
+            if cumulative + bucket >= rank and bucket:
+                if i == len(self._bounds):
+                    return self._bounds[-1]
+                lower = self._bounds[i - 1] if i else 0.0
+                return lower + (self._bounds[i] - lower) * (rank - cumulative) / bucket
+            cumulative += bucket
+        return float('nan')
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus."""
+
+        totals, gauges = self.collect()
+        lines = [
+            '# HELP http_requests_total Requisições atendidas por rota.',
+            '# TYPE http_requests_total counter'
+        ]
+        histogram = [
+            '# HELP http_request_duration_seconds Latência das requisições por rota.',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        errors = [
+            '# HELP http_request_errors_total Respostas de erro por rota e classe de status.',
+            '# TYPE http_request_errors_total counter'
+        ]
+        quantiles = [
+            '# HELP http_request_duration_quantile_seconds Quantis estimados a partir do histograma.',
+            '# TYPE http_request_duration_quantile_seconds gauge'
+        ]
+
+        for endpoint in self._endpoints:
+            base = self._offsets[endpoint]
+            count = totals[base + REQUESTS]
+            if not count:
+                continue
+
+            label = f'endpoint="{endpoint.removeprefix("routes.")}"'
+            lines.append(f'http_requests_total{{{label}}} {count:g}')
+            errors.append(f'http_request_errors_total{{{label},class="5xx"}} {totals[base + SERVER_ERRORS]:g}')
+            errors.append(f'http_request_errors_total{{{label},class="4xx"}} {totals[base + CLIENT_ERRORS]:g}')
+
+            buckets = list(totals[base + BUCKETS:base + self._block])
+            cumulative = 0.0
+            for bound, bucket in zip(self._bounds + ['+Inf'], buckets):
+                cumulative += bucket
+                histogram.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative:g}')
+            histogram.append(f'http_request_duration_seconds_sum{{{label}}} {totals[base + LATENCY_SUM]:.6f}')
+            histogram.append(f'http_request_duration_seconds_count{{{label}}} {count:g}')
+
+            for q in (0.5, 0.95, 0.99):
+                quantiles.append(f'http_request_duration_quantile_seconds{{{label},quantile="{q}"}} {self._quantile(q, buckets, count):.6f}')
+
+        gauge_lines = []
+        for name, value in gauges.items():
+            gauge_lines += [f'# TYPE {name} gauge', f'{name} {value:g}']
+
+        return '\n'.join(lines + errors + histogram + quantiles + gauge_lines) + '\n'
+
+
+class _Lease:
+    """Marca o uso de um arquivo de métricas por uma thread."""
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _pool_gauges() -> tuple[float, float, float]:
+
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return (0.0, 0.0, 0.0)
+    return (pool.size(), pool.checkedout(), max(pool.overflow(), 0))
+
+
+metrics = MetricsStore()
+
+
+def _metrics_allowed(app: Flask) -> bool:
+    """O ``/metrics`` expõe rotas e carga: só quem tiver o token ou, se configurados, IPs liberados."""
+
+    if request.remote_addr in app.config['METRICS_ALLOWED_IPS']:
+        return True
+    token = app.config['METRICS_TOKEN']
+    authorization = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Registra a coleta de métricas por rota e o endpoint ``/metrics``. Deve
+    ser chamada depois de registrar todas as rotas (blueprints e extensões
+    como o profiler), já que o layout dos arquivos é montado a partir delas.
+    """
+
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    @app.route('/metrics')
+    def metrics_view():
+        if not _metrics_allowed(app):
+            abort(403, "You don't have access to this page")
+        return Response(metrics.render(), mimetype = 'text/plain; version=0.0.4')
+
+    metrics.configure(
+        app.config['METRICS_DIR'],
+        [rule.endpoint for rule in app.url_map.iter_rules()],
+        app.config['METRICS_LATENCY_BUCKETS']
+    )
+
+    @app.before_request
+    def start_metrics_timer() -> None:
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_metrics(response: Response) -> Response:
+
+        started = g.get('metrics_started')
+        if started is not None:
+            metrics.observe(request.endpoint, response.status_code, time.perf_counter() - started)
+            metrics.set_gauges(*_pool_gauges(), passwords.queue_depth)
+        return response
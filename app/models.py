@@ -1,3 +1,5 @@
+from flask import current_app, has_app_context
+from sqlalchemy.orm import joinedload, load_only
 from werkzeug.security import generate_password_hash, check_password_hash
 from .db import db
 from datetime import datetime, timezone
@@ -8,31 +10,103 @@ def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+class SparseSerializer:
+    """
+    Serialização com campos esparsos (``?fields=``) e expansão de relações
+    (``?expand=``).
+
+    ``__public_fields__`` lista as colunas que podem ser expostas e
+    ``__expandable__`` mapeia cada relação para a sua chave estrangeira: sem
+    expansão a relação aparece apenas pelo id; expandida, como o ``to_dict()``
+    completo do objeto relacionado. ``__serializer_joins__`` lista as relações
+    que o ``to_dict()`` do próprio modelo percorre, para serem carregadas
+    junto quando ele for expandido.
+    """
+
+    __public_fields__: tuple[str, ...] = ()
+    __expandable__: dict[str, str] = {}
+    __serializer_joins__: tuple[str, ...] = ()
+
+    @classmethod
+    def sparse_options(cls, fields: tuple[str, ...] | None, expand: frozenset[str], *required) -> list:
+        """
+        Opções de carregamento que selecionam do banco apenas as colunas
+        pedidas (mais ``required``, como as chaves da paginação) e carregam
+        com JOIN as relações expandidas.
+        """
+
+        columns = {getattr(cls, name) for name in fields or cls.__public_fields__}
+        columns.update(getattr(cls, cls.__expandable__[name]) for name in expand)
+        columns.update(required)
+        options = [load_only(*columns)]
+
+        for name in expand:
+            relationship = getattr(cls, name)
+            option = joinedload(relationship)
+            related = relationship.property.mapper.class_
+            for nested in getattr(related, '__serializer_joins__', ()):
+                option = option.joinedload(getattr(related, nested))
+            options.append(option)
+
+        return options
+
+    def to_sparse_dict(self, fields: tuple[str, ...] | None, expand: frozenset[str]) -> dict:
+
+        data = {name: getattr(self, name) for name in fields or self.__public_fields__}
+
+        for name in expand:
+            related = getattr(self, name)
+            data[name] = related.to_dict() if related is not None else None
+
+        return data
+
+
 class ResultType(enum.Enum):
     WIN = 'win'
     LOSS = 'loss'
     FLEE = 'flee'
 
 
-class Player(db.Model):
+class Player(SparseSerializer, db.Model):
     __tablename__ = 'player'
+    __public_fields__ = ('id', 'username', 'experience', 'coins', 'role', 'created_at', 'saved_at')
+
+    ROLES = ('player', 'admin')
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(30), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     experience = db.Column(db.BigInteger, default=0)
     coins = db.Column(db.BigInteger, default=0)
     created_at = db.Column(db.DateTime, default=utcnow)
     saved_at = db.Column(db.DateTime, default=utcnow)
+    role = db.Column(db.String(20), nullable=False, default='player', server_default='player')
+    # Incrementado quando o papel muda, invalidando os tokens emitidos antes
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
-    def __init__(self, username, email, password):
+    def __init__(self, username, email, password=None, role='player', password_hash=None):
         self.username = username
         self.email = email
-        self.set_password(password)
+        self.role = role
+        self.token_version = 0
+        if password_hash is not None:
+            self.password_hash = password_hash
+        else:
+            self.set_password(password)
+
+    def set_role(self, role):
+        if role not in self.ROLES:
+            raise ValueError(f'Invalid role: {role}')
+        if role != self.role:
+            self.role = role
+            self.token_version = (self.token_version or 0) + 1
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        if has_app_context():
+            self.password_hash = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+        else:
+            self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -43,8 +117,9 @@ class Player(db.Model):
             'username': self.username,
             'experience': self.experience,
             'coins': self.coins,
-            'created_at': self.created_at.isoformat(),
-            'saved_at': self.saved_at.isoformat() if self.saved_at else None
+            'role': self.role,
+            'created_at': self.created_at,
+            'saved_at': self.saved_at
         }
 
 
@@ -65,12 +140,17 @@ class Insignia(db.Model):
         }
 
 
-class PlayerInsignia(db.Model):
+class PlayerInsignia(SparseSerializer, db.Model):
     __tablename__ = 'player_insignia'
+    __public_fields__ = ('id', 'player_id', 'insignia_id', 'completed_at')
+    __expandable__ = {'player': 'player_id', 'insignia': 'insignia_id'}
+    __table_args__ = (
+        db.Index('ix_player_insignia_player_id_insignia_id', 'player_id', 'insignia_id', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    insignia_id = db.Column(db.Integer, db.ForeignKey('insignia.id'), nullable=False)
+    insignia_id = db.Column(db.Integer, db.ForeignKey('insignia.id'), nullable=False, index=True)
     completed_at = db.Column(db.DateTime, default = utcnow)
 
     player = db.relationship('Player', backref='insignias', lazy=True)
@@ -81,16 +161,17 @@ class PlayerInsignia(db.Model):
             'id': self.id,
             'player': self.player.to_dict(),
             'insignia': self.insignia.to_dict(),
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completed_at': self.completed_at
         }
 
 
 class Phase(db.Model):
     __tablename__ = 'phase'
+    __serializer_joins__ = ('boss',)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(30), nullable=False)
-    boss_id = db.Column(db.Integer, db.ForeignKey('boss.id'))
+    boss_id = db.Column(db.Integer, db.ForeignKey('boss.id'), index=True)
     reward_coins = db.Column(db.Integer, default=0)
     reward_experience = db.Column(db.BigInteger, default=0)
 
@@ -106,13 +187,25 @@ class Phase(db.Model):
         }
 
 
-class PhaseProgress(db.Model):
+class PhaseProgress(SparseSerializer, db.Model):
+    """
+    Progresso de um jogador em uma fase: uma única linha por (jogador, fase),
+    atualizada a cada nova conclusão (ver ``progress.record_completion``).
+    ``completed_at`` é a conclusão mais recente.
+    """
     __tablename__ = 'phase_progress'
+    __public_fields__ = ('id', 'player_id', 'phase_id', 'completed', 'completions', 'first_completed_at', 'completed_at')
+    __expandable__ = {'player': 'player_id', 'phase': 'phase_id'}
+    __table_args__ = (
+        db.Index('ix_phase_progress_player_id_phase_id', 'player_id', 'phase_id', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    phase_id = db.Column(db.Integer, db.ForeignKey('phase.id'), nullable=False)
+    phase_id = db.Column(db.Integer, db.ForeignKey('phase.id'), nullable=False, index=True)
     completed = db.Column(db.Boolean, default=False)
+    completions = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    first_completed_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
 
     player = db.relationship('Player', backref='phase_progress', lazy=True)
@@ -124,20 +217,24 @@ class PhaseProgress(db.Model):
             'player': self.player.to_dict(),
             'phase': self.phase.to_dict(),
             'completed': self.completed,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completions': self.completions,
+            'first_completed_at': self.first_completed_at,
+            'completed_at': self.completed_at
         }
 
 
-class Battle(db.Model):
+class Battle(SparseSerializer, db.Model):
     __tablename__ = 'battle'
+    __public_fields__ = ('id', 'player_id', 'boss_id', 'result', 'reward_coins', 'reward_experience', 'created_at')
+    __expandable__ = {'player': 'player_id', 'boss': 'boss_id'}
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    boss_id = db.Column(db.Integer, db.ForeignKey('boss.id'))
+    boss_id = db.Column(db.Integer, db.ForeignKey('boss.id'), index=True)
     result = db.Column(db.Enum(ResultType), default=ResultType.WIN)
     reward_coins = db.Column(db.Integer, default=0)
     reward_experience = db.Column(db.BigInteger, default=0)
-    created_at = db.Column(db.DateTime, default=utcnow)
+    created_at = db.Column(db.DateTime, default=utcnow, index=True)
 
     player = db.relationship('Player', backref='battles', lazy=True)
     boss = db.relationship('Boss', backref='battles', lazy=True)
@@ -146,14 +243,18 @@ class Battle(db.Model):
         return {
             'id': self.id,
             'player': self.player.to_dict(),
-            'boss': self.boss.to_dict(),
-            'result': self.result.value,
-            'created_at': self.created_at.isoformat(),
+            'boss': self.boss.to_dict() if self.boss else None,
+            'result': self.result,
+            'created_at': self.created_at,
             'reward_coins': self.reward_coins,
             'reward_experience': self.reward_experience
         }
 
 
+# Histórico de batalhas de um jogador, do mais recente para o mais antigo
+db.Index('ix_battle_player_id_created_at', Battle.player_id, Battle.created_at.desc(), Battle.id.desc())
+
+
 class Item(db.Model):
     __tablename__ = 'item'
 
@@ -170,11 +271,13 @@ class Item(db.Model):
         }
 
 
-class PlayerItem(db.Model):
+class PlayerItem(SparseSerializer, db.Model):
     __tablename__ = 'player_items'
+    __public_fields__ = ('player_id', 'item_id')
+    __expandable__ = {'player': 'player_id', 'item': 'item_id'}
 
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), primary_key=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True, index=True)
 
     player = db.relationship('Player', backref='items', lazy=True)
     item = db.relationship('Item', backref='players', lazy=True)
@@ -199,3 +302,45 @@ class Boss(db.Model):
             'name': self.name,
             'health': self.health
         }
+
+
+class PlayerStats(db.Model):
+    """
+    Estatísticas de batalha de um jogador, mantidas incrementalmente a cada
+    batalha registrada (ver ``stats.record_battles``). As recompensas somam
+    só as vitórias, que são as que o jogador de fato recebe.
+    """
+    __tablename__ = 'player_stats'
+
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), primary_key=True)
+    battles = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    flees = db.Column(db.Integer, nullable=False, default=0)
+    reward_coins = db.Column(db.BigInteger, nullable=False, default=0)
+    reward_experience = db.Column(db.BigInteger, nullable=False, default=0)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    best_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_battle_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'player_id': self.player_id,
+            'battles': self.battles,
+            'wins': self.wins,
+            'losses': self.losses,
+            'flees': self.flees,
+            'reward_coins': self.reward_coins,
+            'reward_experience': self.reward_experience,
+            'current_streak': self.current_streak,
+            'best_streak': self.best_streak,
+            'last_battle_at': self.last_battle_at
+        }
+
+
+class CatalogVersion(db.Model):
+    """Versão de cada catálogo em cache, incrementada pelas rotas de CRUD."""
+    __tablename__ = 'catalog_version'
+
+    name = db.Column(db.String(30), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
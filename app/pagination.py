@@ -0,0 +1,143 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Iterator, NamedTuple
+from flask import Response, abort, current_app, request, stream_with_context
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from .validation import is_int
+
+
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str | None
+
+
+def encode_cursor(values: list[Any]) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _cursor_value(key, value: Any) -> Any:
+    """Confere o tipo de um valor do cursor contra a coluna da chave."""
+
+    python_type = key.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError(value)
+        return datetime.fromisoformat(value)
+    if not (is_int(value) if python_type is int else isinstance(value, python_type)):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, keys: tuple) -> list[Any]:
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [_cursor_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        abort(400, description = "Cursor inválido")
+
+
+def _ordered(query: Query, keys: tuple, descending: bool) -> Query:
+    """Ordena pela chave e, se houver ``cursor`` na requisição, continua depois dele."""
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            query = query.filter(keys[0] < values[0] if descending else keys[0] > values[0])
+        else:
+            query = query.filter(tuple_(*keys) < tuple(values) if descending else tuple_(*keys) > tuple(values))
+
+    return query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+
+
+def page_limit() -> int:
+    """Tamanho de página pedido em ``?limit=``, limitado a ``MAX_PAGE_SIZE``."""
+
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type = int)
+    return min(max(limit, 1), current_app.config['MAX_PAGE_SIZE'])
+
+
+def paginate(query: Query, *keys, descending: bool = False) -> Page:
+    """
+    Paginação por chave (keyset): retorna até ``limit`` linhas posteriores ao
+    ``cursor`` informado na requisição, ordenadas por ``keys``.
+    """
+
+    limit = page_limit()
+    rows = _ordered(query, keys, descending).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor([getattr(last, key.key) for key in keys]))
+
+
+def set_next_cursor(response: Response, page: Page) -> Response:
+    """Informa o cursor da próxima página no cabeçalho ``X-Next-Cursor``."""
+
+    if page.next_cursor is not None:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+def wants_stream() -> bool:
+    return 'stream' in request.args
+
+
+def stream(query: Query, *keys, serialize: Callable[[Any], dict], descending: bool = False) -> Response:
+    """
+    Transmite todas as linhas posteriores ao ``cursor`` como um array JSON
+    (``?stream=json``) ou uma linha JSON por registro (``?stream=ndjson``).
+
+    As linhas são lidas em lotes de um cursor do lado do servidor, então a
+    memória usada não depende do tamanho da tabela.
+    """
+
+    fmt = request.args.get('stream') or 'ndjson'
+    if fmt not in STREAM_FORMATS:
+        abort(400, description = f"Formato de stream inválido: {fmt}")
+
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+    rows = _ordered(query, keys, descending).yield_per(chunk_size)
+    dumps = current_app.json.dumps
+
+    def generate() -> Iterator[str]:
+
+        chunk: list[str] = []
+        first = True
+        if fmt == 'json':
+            yield '['
+
+        for row in rows:
+            data = dumps(serialize(row))
+            if fmt == 'ndjson':
+                chunk.append(data + '\n')
+            elif first:
+                chunk.append(data)
+                first = False
+            else:
+                chunk.append(',' + data)
+
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk.clear()
+
+        if chunk:
+            yield ''.join(chunk)
+        if fmt == 'json':
+            yield ']'
+
+    return Response(stream_with_context(generate()), mimetype = STREAM_FORMATS[fmt])
@@ -0,0 +1,96 @@
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import abort, current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasher:
+    """
+    Executa o hash e a verificação de senhas em um pool de processos dedicado.
+
+    O hash padrão do werkzeug é propositalmente caro em CPU e memória; rodá-lo
+    na thread da requisição faz os workers do gunicorn ficarem presos durante
+    picos de login. O pool tem ``PASSWORD_POOL_SIZE`` processos e aceita no
+    máximo ``PASSWORD_POOL_QUEUE_LIMIT`` tarefas esperando; acima disso a
+    requisição recebe 503. Com ``PASSWORD_POOL_SIZE = 0`` o hash roda na
+    própria thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+        self._slots: threading.BoundedSemaphore | None = None
+        self._pid: int | None = None
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Quantidade de tarefas em execução ou esperando no pool deste processo."""
+        return self._in_flight
+
+    @property
+    def method(self) -> str:
+        return current_app.config['PASSWORD_HASH_METHOD']
+
+    def _get_executor(self) -> Executor:
+
+        # Cada worker do gunicorn cria o seu próprio pool após o fork
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    config = current_app.config
+                    self._executor = ProcessPoolExecutor(max_workers = config['PASSWORD_POOL_SIZE'])
+                    self._slots = threading.BoundedSemaphore(
+                        config['PASSWORD_POOL_SIZE'] + config['PASSWORD_POOL_QUEUE_LIMIT']
+                    )
+                    self._pid = os.getpid()
+                    self._in_flight = 0
+        return self._executor
+
+    def _run(self, fn, *args):
+
+        if not current_app.config['PASSWORD_POOL_SIZE']:
+            return fn(*args)
+
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking = False):
+            abort(503, "Password hashing queue is full")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._finished(slots)
+            raise
+
+        # A vaga só é liberada quando o pool termina a tarefa, mesmo que a
+        # requisição desista antes por timeout
+        future.add_done_callback(lambda _: self._finished(slots))
+        try:
+            return future.result(timeout = current_app.config['PASSWORD_POOL_TIMEOUT'])
+        except FutureTimeoutError:
+            abort(503, "Password hashing timed out")
+
+    def _finished(self, slots: threading.BoundedSemaphore) -> None:
+
+        with self._lock:
+            if slots is self._slots:
+                self._in_flight -= 1
+        slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Indica se o hash foi gerado com parâmetros diferentes de ``PASSWORD_HASH_METHOD``."""
+        return password_hash.split('$', 1)[0] != self.method
+
+
+passwords = PasswordHasher()
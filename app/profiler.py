@@ -0,0 +1,164 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from flask import Flask, Response, abort, current_app, g, request, send_from_directory
+from .auth import admin_required
+
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Ordenações aceitas em /profiles/<nome>?format=text&sort=
+PROFILE_SORT_KEYS = tuple(sorted(key.value for key in pstats.SortKey))
+
+
+class SamplingProfiler:
+    """
+    Amostra a pilha de uma thread a cada ``interval`` segundos, a partir de
+    outra thread, e agrega as pilhas no formato "collapsed" (uma linha por
+    pilha, ``a;b;c contagem``) usado por flamegraph.pl e speedscope.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target = self._run, name = 'request-sampler', daemon = True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+def _requested_mode() -> str | None:
+    return request.args.get('profile') or request.headers.get('X-Profile')
+
+
+@admin_required
+def _authorize() -> None:
+    """Só administradores podem pedir o profile de uma requisição."""
+
+
+def init_profiler(app: Flask) -> None:
+    """
+    Permite que um administrador rode uma requisição sob um profiler,
+    passando ``?profile=cprofile|sample`` ou o cabeçalho ``X-Profile``.
+
+    ``cprofile`` grava um arquivo pstats (``.prof``, para snakeviz ou
+    ``pstats``); ``sample`` grava pilhas amostradas a cada
+    ``PROFILE_SAMPLE_INTERVAL`` segundos em formato collapsed (``.folded``).
+    Os arquivos ficam em ``PROFILE_DIR``, o nome vai no cabeçalho
+    ``X-Profile`` da resposta e ``/profiles/<nome>`` os devolve. Sem o
+    parâmetro, o custo por requisição é só a leitura do parâmetro e do
+    cabeçalho.
+    """
+
+    if not app.config['PROFILER_ENABLED']:
+        return
+
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok = True)
+
+    @app.before_request
+    def start_profiler() -> None:
+
+        mode = _requested_mode()
+        if mode is None:
+            return
+        if mode not in PROFILE_MODES:
+            abort(400, description = f"Profiler inválido: {mode}. Use um de {', '.join(PROFILE_MODES)}")
+        _authorize()
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = SamplingProfiler(current_app.config['PROFILE_SAMPLE_INTERVAL'])
+            profiler.start()
+        g.profiler = (mode, profiler, time.perf_counter())
+
+    @app.after_request
+    def store_profile(response: Response) -> Response:
+
+        name = _stop_profiler()
+        if name is not None:
+            response.headers['X-Profile'] = name
+        return response
+
+    @app.teardown_request
+    def discard_profile(error: BaseException | None) -> None:
+        # Exceção antes do after_request: só para o profiler
+        _stop_profiler(store = False)
+
+    @app.route('/profiles/<name>')
+    @admin_required
+    def get_profile(name: str):
+        """Devolve um profile gravado; ``?format=text`` resume um ``.prof`` como texto."""
+
+        if name.endswith('.prof') and request.args.get('format') == 'text':
+            path = os.path.join(directory, os.path.basename(name))
+            if not os.path.isfile(path):
+                abort(404)
+            sort = request.args.get('sort', 'cumulative')
+            if sort not in PROFILE_SORT_KEYS:
+                abort(400, description = f"Ordenação inválida: {sort}. Use uma de {', '.join(PROFILE_SORT_KEYS)}")
+
+            output = io.StringIO()
+            stats = pstats.Stats(path, stream = output)
+            stats.sort_stats(sort).print_stats(request.args.get('limit', 50, type = int))
+            return Response(output.getvalue(), mimetype = 'text/plain')
+
+        return send_from_directory(directory, name, mimetype = 'text/plain' if name.endswith('.folded') else None)
+
+
+def _stop_profiler(store: bool = True) -> str | None:
+
+    if 'profiler' not in g:
+        return None
+
+    mode, profiler, started = g.pop('profiler')
+    if mode == 'cprofile':
+        profiler.disable()
+    else:
+        profiler.stop()
+    if not store:
+        return None
+
+    endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', (request.endpoint or 'unmatched').removeprefix('routes.'))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-{elapsed_ms:.0f}ms-{uuid.uuid4().hex[:8]}'
+    name += '.prof' if mode == 'cprofile' else '.folded'
+
+    path = os.path.join(current_app.config['PROFILE_DIR'], name)
+    if mode == 'cprofile':
+        profiler.dump_stats(path)
+    else:
+        profiler.dump(path)
+    return name
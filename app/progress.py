@@ -0,0 +1,103 @@
+import click
+from sqlalchemy import case, delete, func, inspect, select, text, update
+from .db import db, dialect_insert
+from .models import PhaseProgress, utcnow
+
+
+def record_completion(player_id: int, phase_id: int) -> None:
+    """
+    Registra uma conclusão da fase com um único ``INSERT ... ON CONFLICT DO
+    UPDATE``: cria a linha do par (jogador, fase) na primeira vez e, nas
+    seguintes, só incrementa ``completions`` e atualiza ``completed_at``.
+    """
+
+    now = utcnow()
+    statement = dialect_insert(PhaseProgress).values(
+        player_id = player_id,
+        phase_id = phase_id,
+        completed = True,
+        completions = 1,
+        first_completed_at = now,
+        completed_at = now
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements = [PhaseProgress.player_id, PhaseProgress.phase_id],
+        set_ = {
+            'completed': True,
+            'completions': PhaseProgress.completions + 1,
+            'first_completed_at': func.coalesce(PhaseProgress.first_completed_at, now),
+            'completed_at': now
+        }
+    ))
+
+
+def _add_missing_columns(conn) -> None:
+
+    columns = {column['name'] for column in inspect(conn).get_columns(PhaseProgress.__tablename__)}
+    for column in (PhaseProgress.__table__.c.completions, PhaseProgress.__table__.c.first_completed_at):
+        if column.name not in columns:
+            ddl = f'{column.name} {column.type.compile(conn.dialect)}'
+            if column.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+            conn.execute(text(f'ALTER TABLE {PhaseProgress.__tablename__} ADD COLUMN {ddl}'))
+
+
+def _ensure_unique_index(conn) -> None:
+
+    index = next(index for index in PhaseProgress.__table__.indexes if index.unique)
+    existing = {item['name']: item for item in inspect(conn).get_indexes(PhaseProgress.__tablename__)}
+    if index.name in existing and not existing[index.name]['unique']:
+        conn.execute(text(f'DROP INDEX {index.name}'))
+        del existing[index.name]
+    if index.name not in existing:
+        index.create(conn)
+
+
+def compact_phase_progress(conn) -> tuple[int, int]:
+    """
+    Junta o histórico antigo (uma linha por conclusão) em uma linha por
+    (jogador, fase), somando as conclusões e guardando a primeira e a última
+    data. Pode ser executada mais de uma vez. Retorna as linhas antes e depois.
+    """
+
+    _add_missing_columns(conn)
+    table = PhaseProgress.__table__
+    before = conn.execute(select(func.count()).select_from(table)).scalar_one()
+
+    kept = table.alias('kept')
+    keep = select(func.min(kept.c.id)).group_by(kept.c.player_id, kept.c.phase_id)
+    same = table.alias('same')
+    group = (same.c.player_id == table.c.player_id) & (same.c.phase_id == table.c.phase_id)
+
+    def aggregate(expression):
+        return select(expression).where(group).scalar_subquery()
+
+    # Linhas antigas valem uma conclusão; linhas já compactadas trazem a contagem
+    conn.execute(
+        update(table)
+        .where(table.c.id.in_(keep))
+        .values(
+            completed = aggregate(func.max(same.c.completed)),
+            completions = aggregate(func.sum(case((same.c.completions > 0, same.c.completions), else_ = 1))),
+            first_completed_at = aggregate(func.min(func.coalesce(same.c.first_completed_at, same.c.completed_at))),
+            completed_at = aggregate(func.max(same.c.completed_at))
+        )
+    )
+    conn.execute(delete(table).where(table.c.id.not_in(keep)))
+
+    _ensure_unique_index(conn)
+    after = conn.execute(select(func.count()).select_from(table)).scalar_one()
+    return before, after
+
+
+@click.command('compact-phase-progress')
+def compact_phase_progress_command():
+    """
+    Compacta ``phase_progress`` para uma linha por (jogador, fase) e cria o
+    índice único usado pelo upsert. Rode antes de ``flask db upgrade`` em
+    bancos com o histórico antigo.
+    """
+
+    with db.engine.begin() as conn:
+        before, after = compact_phase_progress(conn)
+    click.echo(f'phase_progress: {before} linha(s) -> {after}')
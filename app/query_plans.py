@@ -0,0 +1,79 @@
+import click
+from datetime import datetime
+from sqlalchemy import Engine, create_engine, select, tuple_
+from sqlalchemy.sql import Select
+from .db import db
+from .models import Battle, Insignia, PhaseProgress, Player, PlayerInsignia, PlayerItem
+
+
+def hot_queries() -> dict[str, Select]:
+    """Consultas dos caminhos críticos, montadas como nas rotas correspondentes."""
+
+    return {
+        'player_battles': select(Battle)
+            .where(Battle.player_id == 1)
+            .order_by(Battle.created_at.desc(), Battle.id.desc())
+            .limit(100),
+        'player_battles (cursor)': select(Battle)
+            .where(Battle.player_id == 1, tuple_(Battle.created_at, Battle.id) < (datetime(2025, 1, 1), 500))
+            .order_by(Battle.created_at.desc(), Battle.id.desc())
+            .limit(100),
+        'list_battles (cursor)': select(Battle).where(Battle.id > 500).order_by(Battle.id).limit(100),
+        'player_phases': select(PhaseProgress)
+            .where(PhaseProgress.player_id == 1)
+            .order_by(PhaseProgress.phase_id)
+            .limit(100),
+        'player_insignias': select(PlayerInsignia).where(PlayerInsignia.player_id == 1),
+        'main_insignia': select(Insignia)
+            .join(PlayerInsignia, PlayerInsignia.insignia_id == Insignia.id)
+            .where(PlayerInsignia.player_id == 1)
+            .order_by(Insignia.xp_required.desc())
+            .limit(1),
+        'grant_insignias (owned)': select(PlayerInsignia.insignia_id)
+            .where(PlayerInsignia.player_id == 1, PlayerInsignia.insignia_id.in_([1, 2, 3])),
+        'player_items': select(PlayerItem).where(PlayerItem.player_id == 1),
+        'recompute player_stats': select(Battle.player_id, Battle.result, Battle.reward_coins, Battle.created_at)
+            .where(Battle.player_id.in_([1]))
+            .order_by(Battle.player_id, Battle.created_at, Battle.id),
+        'player by username': select(Player).where(Player.username == 'admin'),
+    }
+
+
+def explain(engine: Engine, statement: Select) -> list[str]:
+    """Retorna as linhas de ``EXPLAIN QUERY PLAN`` da consulta."""
+
+    compiled = statement.compile(dialect = engine.dialect, compile_kwargs = {'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Passos do plano que percorrem uma tabela inteira em vez de buscar por índice."""
+    return [step for step in plan if step.startswith('SCAN') and 'USING' not in step]
+
+
+@click.command('check-query-plans')
+@click.option('--database', default = None, help = 'URL de um banco existente (por padrão, um SQLite em memória com o schema atual).')
+@click.option('--verbose', '-v', is_flag = True, help = 'Mostra o plano completo de cada consulta.')
+def check_query_plans_command(database: str | None, verbose: bool):
+    """Falha se alguma consulta crítica passar a fazer varredura completa de tabela."""
+
+    # Um banco informado é só consultado: o schema dele é o que está sendo verificado
+    engine = create_engine(database or 'sqlite://')
+    if database is None:
+        db.metadata.create_all(engine)
+
+    failures = 0
+    for name, statement in hot_queries().items():
+        plan = explain(engine, statement)
+        scans = full_scans(plan)
+        click.echo(f"{'FAIL' if scans else 'ok':<5}{name}")
+        for step in plan if verbose else scans:
+            click.echo(f'       {step}')
+        failures += bool(scans)
+
+    engine.dispose()
+    if failures:
+        raise click.ClickException(f'{failures} consulta(s) com varredura completa de tabela')
@@ -0,0 +1,94 @@
+from sqlalchemy import exists, insert, literal, select, update
+from .db import db
+from .models import Insignia, Player, PlayerInsignia, utcnow
+from .insignia_table import insignia_table
+
+
+def _increment(player_id: int, coins: int, experience: int) -> Player | None:
+    """
+    Soma ``coins`` e ``experience`` ao jogador com um único
+    ``UPDATE ... RETURNING``, sem ler e regravar os contadores em Python.
+    Também atualiza ``saved_at``, que serve de ETag para ``/players/<id>``.
+    """
+
+    return db.session.execute(
+        update(Player)
+        .where(Player.id == player_id)
+        .values(coins = Player.coins + coins, experience = Player.experience + experience, saved_at = utcnow())
+        .returning(Player)
+    ).scalar_one_or_none()
+
+
+def grant_insignias(player: Player, old_experience: int) -> None:
+    """
+    Concede as conquistas cujo requisito de XP foi atingido ao passar de
+    ``old_experience`` para a experiência atual do jogador.
+    """
+    crossed = insignia_table.crossed(old_experience or 0, player.experience or 0)
+    if not crossed:
+        return
+
+    owned_ids: set[int] = set(db.session.scalars(
+        select(PlayerInsignia.insignia_id).filter(
+            PlayerInsignia.player_id == player.id,
+            PlayerInsignia.insignia_id.in_([insignia_id for insignia_id, _ in crossed])
+        )
+    ))
+
+    new_insignias = [(insignia_id, reward_coins) for insignia_id, reward_coins in crossed if insignia_id not in owned_ids]
+    if not new_insignias:
+        return
+
+    db.session.execute(
+        insert(PlayerInsignia),
+        [{'player_id': player.id, 'insignia_id': insignia_id} for insignia_id, _ in new_insignias]
+    )
+
+    bonus_coins = sum(reward_coins for _, reward_coins in new_insignias)
+    if bonus_coins:
+        _increment(player.id, bonus_coins, 0)
+
+
+def backfill_insignia(insignia: Insignia) -> None:
+    """
+    Concede uma conquista criada (ou com requisito de XP reduzido) a todos os
+    jogadores que já têm a experiência exigida e ainda não a possuem, somando
+    o bônus de moedas. São dois comandos em lote, sem carregar jogadores; a
+    transação não é confirmada aqui.
+    """
+
+    owed = (
+        (Player.experience >= (insignia.xp_required or 0))
+        & ~exists().where(PlayerInsignia.player_id == Player.id, PlayerInsignia.insignia_id == insignia.id)
+    )
+    now = utcnow()
+
+    # As moedas primeiro: depois do INSERT os jogadores já possuem a conquista
+    if insignia.reward_coins:
+        db.session.execute(
+            update(Player)
+            .where(owed)
+            .values(coins = Player.coins + insignia.reward_coins, saved_at = now)
+            .execution_options(synchronize_session = False)
+        )
+    db.session.execute(insert(PlayerInsignia).from_select(
+        ['player_id', 'insignia_id', 'completed_at'],
+        select(Player.id, literal(insignia.id), literal(now)).where(owed)
+    ))
+
+
+def apply_rewards(player_id: int, coins: int, experience: int) -> Player | None:
+    """
+    Aplica as recompensas ao jogador de forma atômica e concede as conquistas
+    alcançadas. Retorna o jogador atualizado, ou ``None`` se ele não existir.
+    A transação não é confirmada aqui.
+    """
+
+    player = _increment(player_id, coins or 0, experience or 0)
+    if player is None:
+        return None
+
+    # Os valores retornados já incluem atualizações concorrentes confirmadas
+    # antes desta, então a faixa de XP atravessada é exatamente a desta recompensa
+    grant_insignias(player, player.experience - (experience or 0))
+    return player
@@ -1,6 +1,17 @@
-from flask import Blueprint, request, jsonify
+from collections import defaultdict
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
 from ..db import db
-from ..models import Battle, ResultType
+from ..models import Battle, Player, ResultType
+from ..auth import admin_required
+from ..catalog import catalog
+from ..leaderboard import leaderboard
+from ..pagination import paginate, set_next_cursor, stream, wants_stream
+from ..fieldsets import apply_fieldset, parse_fieldset, serializer
+from ..rewards import apply_rewards
+from ..stats import BattleSummary, record_battle, record_battles, recompute
+from ..validation import is_int
 
 
 bp = Blueprint('battles', __name__, url_prefix='/battles')
@@ -8,8 +19,18 @@ bp = Blueprint('battles', __name__, url_prefix='/battles')
 
 @bp.route('/')
 def list_battles():
-    battles = Battle.query.all()
-    return jsonify([battle.to_dict() for battle in battles])
+    fieldset = parse_fieldset(Battle)
+    if fieldset is None:
+        query = Battle.query.options(joinedload(Battle.player), joinedload(Battle.boss))
+    else:
+        query = apply_fieldset(Battle.query, Battle, fieldset, Battle.id)
+
+    serialize = serializer(Battle, fieldset)
+    if wants_stream():
+        return stream(query, Battle.id, serialize = serialize)
+
+    page = paginate(query, Battle.id)
+    return set_next_cursor(jsonify([serialize(battle) for battle in page.items]), page)
 
 
 @bp.route('/<int:id>')
@@ -28,15 +49,121 @@ def create_battle():
     )
 
     db.session.add(battle)
+    record_battle(battle)
     db.session.commit()
 
     return battle.to_dict(), 201
 
 
+@bp.route('/batch', methods = ['POST'])
+@admin_required
+def create_battles_batch():
+    """
+    Registra várias batalhas de uma vez: um único INSERT em lote, um UPDATE
+    de recompensas por jogador, a verificação de conquistas uma vez por
+    jogador e um único commit. Retorna o resultado de cada item.
+    """
+
+    data = request.get_json()
+    items = data.get('battles') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        abort(400, description = "O campo 'battles' deve ser uma lista não vazia")
+
+    max_size = current_app.config['BATTLE_BATCH_MAX_SIZE']
+    if len(items) > max_size:
+        abort(400, description = f"No máximo {max_size} batalhas por requisição")
+
+    results: list[dict] = [None] * len(items)
+    candidates: list[tuple[int, dict]] = []
+    for index, item in enumerate(items):
+
+        if not isinstance(item, dict) or 'player_id' not in item or 'result' not in item:
+            results[index] = {'index': index, 'status': 'error', 'message': "Campos 'player_id' e 'result' são obrigatórios"}
+            continue
+
+        if not is_int(item['player_id']) or not (item.get('boss_id') is None or is_int(item['boss_id'])):
+            results[index] = {'index': index, 'status': 'error', 'message': "'player_id' e 'boss_id' devem ser números inteiros"}
+            continue
+
+        if not all(is_int(item.get(field, 0)) for field in ('reward_coins', 'reward_experience')):
+            results[index] = {'index': index, 'status': 'error', 'message': "'reward_coins' e 'reward_experience' devem ser números inteiros"}
+            continue
+
+        candidates.append((index, item))
+
+    player_ids = {item['player_id'] for _, item in candidates}
+    existing_ids = set(db.session.scalars(select(Player.id).where(Player.id.in_(player_ids))))
+
+    rows: list[dict] = []
+    indexes: list[int] = []
+    rewards: defaultdict[int, list[int]] = defaultdict(lambda: [0, 0])
+    summaries: defaultdict[int, BattleSummary] = defaultdict(BattleSummary)
+
+    for index, item in candidates:
+
+        if item['player_id'] not in existing_ids:
+            results[index] = {'index': index, 'status': 'error', 'message': f"Jogador {item['player_id']} não encontrado"}
+            continue
+
+        reward_coins = item.get('reward_coins', 0)
+        reward_experience = item.get('reward_experience', 0)
+        try:
+            result = ResultType(item['result'])
+        except (ValueError, TypeError) as error:
+            results[index] = {'index': index, 'status': 'error', 'message': str(error)}
+            continue
+
+        rows.append({
+            'player_id': item['player_id'],
+            'boss_id': item.get('boss_id'),
+            'result': result,
+            'reward_coins': reward_coins,
+            'reward_experience': reward_experience
+        })
+        indexes.append(index)
+        summaries[item['player_id']].add(result, reward_coins, reward_experience)
+
+        if result == ResultType.WIN:
+            totals = rewards[item['player_id']]
+            totals[0] += reward_coins
+            totals[1] += reward_experience
+
+    if rows:
+        # No SQLite o RETURNING ordenado não suporta lotes e viraria um INSERT
+        # por linha. Lá os ids de um mesmo INSERT são alocados em ordem
+        # crescente, então basta ordenar os ids retornados.
+        ordered = db.engine.dialect.name != 'sqlite'
+        battle_ids = db.session.scalars(
+            insert(Battle).returning(Battle.id, sort_by_parameter_order = ordered),
+            rows
+        ).all()
+        if not ordered:
+            battle_ids.sort()
+
+        for index, battle_id in zip(indexes, battle_ids):
+            results[index] = {'index': index, 'status': 'created', 'id': battle_id}
+
+    for player_id, summary in summaries.items():
+        record_battles(player_id, summary)
+
+    players = [apply_rewards(player_id, coins, experience) for player_id, (coins, experience) in rewards.items()]
+    ranking = [(player.id, player.username, player.experience) for player in players]
+    db.session.commit()
+    for entry in ranking:
+        leaderboard.set(*entry)
+
+    return jsonify({
+        'created': len(rows),
+        'failed': len(items) - len(rows),
+        'results': results
+    }), 201 if rows else 400
+
+
 @bp.route('/<int:id>', methods = ['PUT'])
 def update_battle(id: int):
     battle = Battle.query.get_or_404(id)
     data = request.get_json()
+    old_player_id = battle.player_id
 
     if 'player_id' in data:
         battle.player_id = data['player_id']
@@ -45,6 +172,9 @@ def update_battle(id: int):
     if 'result' in data:
         battle.result = ResultType(data['result'])
 
+    recompute(*{old_player_id, battle.player_id})
+    # As análises por boss de todos os workers dependem dessa versão
+    catalog.bump('battles')
     db.session.commit()
 
     return jsonify({
@@ -57,6 +187,8 @@ def update_battle(id: int):
 def delete_battle(id: int):
     battle = Battle.query.get_or_404(id)
     db.session.delete(battle)
+    recompute(battle.player_id)
+    catalog.bump('battles')
     db.session.commit()
 
     return jsonify({
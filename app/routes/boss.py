@@ -1,14 +1,34 @@
 from flask import Blueprint, request, jsonify
 from ..db import db
 from ..models import Boss
+from ..analytics import boss_analytics
+from ..auth import admin_required
+from ..catalog import catalog
+from ..pagination import stream, wants_stream
 
 
 bp = Blueprint('boss', __name__, url_prefix = '/boss')
 
+catalog.register(
+    'bosses',
+    Boss.id,
+    lambda: [boss.to_dict() for boss in Boss.query.order_by(Boss.id)],
+    lambda rows, next_cursor: rows
+)
+
 
 @bp.route('/')
 def boss():
-    return [boss.to_dict() for boss in Boss.query.all()]
+    if wants_stream():
+        return stream(Boss.query, Boss.id, serialize = Boss.to_dict)
+    return catalog.response('bosses')
+
+
+@bp.route('/analytics')
+@admin_required
+def analytics():
+    """Indicadores de dificuldade por boss, recalculados só quando há batalhas novas."""
+    return jsonify(boss_analytics.get())
 
 
 @bp.route('/<int:id>')
@@ -26,6 +46,7 @@ def new_boss():
     )
 
     db.session.add(boss)
+    catalog.bump('bosses')
     db.session.commit()
 
     return boss.to_dict()
@@ -46,6 +67,7 @@ def update_boss(id: int):
         if data_json.get(attr):
             setattr(boss, attr, data_json[attr])
 
+    catalog.bump('bosses', 'phases')
     db.session.commit()
 
     return jsonify({
@@ -59,6 +81,7 @@ def delete_boss(id: int):
 
     boss = Boss.query.get_or_404(id)
     db.session.delete(boss)
+    catalog.bump('bosses', 'phases')
     db.session.commit()
 
     return jsonify({
@@ -2,18 +2,31 @@ from flask import Blueprint, request, jsonify, abort
 from ..db import db
 from ..models import Insignia
 from ..auth import admin_required
+from ..pagination import stream, wants_stream
+from ..insignia_table import insignia_table
+from ..catalog import catalog
+from ..rewards import backfill_insignia
 
 
 bp = Blueprint('insignias', __name__, url_prefix = '/insignias')
 
+catalog.register(
+    'insignias',
+    Insignia.id,
+    lambda: [i.to_dict() for i in Insignia.query.order_by(Insignia.id)],
+    lambda rows, next_cursor: {
+        'insignias': rows,
+        'total': len(rows),
+        'next_cursor': next_cursor
+    }
+)
+
 
 @bp.route('/', methods = ['GET'])
 def index():
-    insignias = Insignia.query.all()
-    return jsonify({
-        'insignias': [i.to_dict() for i in insignias],
-        'total': len(insignias)
-    })
+    if wants_stream():
+        return stream(Insignia.query, Insignia.id, serialize = Insignia.to_dict)
+    return catalog.response('insignias')
 
 
 @bp.route('/', methods=['POST'])
@@ -33,7 +46,12 @@ def create_insignia():
     )
 
     db.session.add(insignia)
+    db.session.flush()
+    # Jogadores que já passaram do requisito não atravessam mais essa faixa de XP
+    backfill_insignia(insignia)
+    catalog.bump('insignias')
     db.session.commit()
+    insignia_table.invalidate()
 
     return insignia.to_dict(), 201
 
@@ -56,13 +74,18 @@ def update_insignia(id: int):
             abort(400, description="Já existe uma conquista com este nome")
         insignia.name = data['name']
     
+    old_xp_required = insignia.xp_required or 0
     if 'xp_required' in data:
         insignia.xp_required = data['xp_required']
 
     if 'reward_coins' in data:
         insignia.reward_coins = data['reward_coins']
 
+    if (insignia.xp_required or 0) < old_xp_required:
+        backfill_insignia(insignia)
+    catalog.bump('insignias')
     db.session.commit()
+    insignia_table.invalidate()
 
     return jsonify({
         'message': f'Conquista {id} atualizada com sucesso.',
@@ -75,7 +98,9 @@ def update_insignia(id: int):
 def delete_insignia(id: int):
     insignia = Insignia.query.get_or_404(id)
     db.session.delete(insignia)
+    catalog.bump('insignias')
     db.session.commit()
+    insignia_table.invalidate()
     return jsonify({
         'message': f'Conquista {id} deletada com sucesso.'
     }), 200
@@ -1,18 +1,29 @@
 from flask import Blueprint, request, jsonify
 from ..db import db
 from ..models import Item
+from ..catalog import catalog
+from ..pagination import stream, wants_stream
 
 
 bp = Blueprint('items', __name__, url_prefix = '/items')
 
+catalog.register(
+    'items',
+    Item.id,
+    lambda: [item.to_dict() for item in Item.query.order_by(Item.id)],
+    lambda rows, next_cursor: {
+        "items": rows,
+        "total": len(rows),
+        "next_cursor": next_cursor
+    }
+)
+
 
 @bp.route('/')
 def items():
-    items = Item.query.all()
-    return {
-        "items": [item.to_dict() for item in items],
-        "total": len(items)
-    }
+    if wants_stream():
+        return stream(Item.query, Item.id, serialize = Item.to_dict)
+    return catalog.response('items')
 
 
 @bp.route('/<int:id>')
@@ -30,6 +41,7 @@ def new_item():
     )
 
     db.session.add(item)
+    catalog.bump('items')
     db.session.commit()
 
     return item.to_dict()
@@ -54,6 +66,7 @@ def update_item(id: int):
         if data_json.get(attr):
             setattr(item, attr, data_json[attr])
 
+    catalog.bump('items')
     db.session.commit()
 
     return jsonify({
@@ -67,6 +80,7 @@ def delete_item(id: int):
 
     item = Item.query.get_or_404(id)
     db.session.delete(item)
+    catalog.bump('items')
     db.session.commit()
 
     return jsonify({
@@ -1,14 +1,26 @@
 from flask import Blueprint, request, jsonify, abort
+from sqlalchemy.orm import joinedload
 from ..db import db
 from ..models import Phase
+from ..catalog import catalog
+from ..pagination import stream, wants_stream
 
 
 bp = Blueprint('phases', __name__, url_prefix = '/phases')
 
+catalog.register(
+    'phases',
+    Phase.id,
+    lambda: [phase.to_dict() for phase in Phase.query.options(joinedload(Phase.boss)).order_by(Phase.id)],
+    lambda rows, next_cursor: rows
+)
+
 
 @bp.route('/')
 def phases():
-    return jsonify([phase.to_dict() for phase in Phase.query.all()])
+    if wants_stream():
+        return stream(Phase.query.options(joinedload(Phase.boss)), Phase.id, serialize = Phase.to_dict)
+    return catalog.response('phases')
 
 
 @bp.route('/<int:id>')
@@ -32,6 +44,7 @@ def new_phase():
     )
 
     db.session.add(phase)
+    catalog.bump('phases')
     db.session.commit()
 
     return phase.to_dict(), 201
@@ -54,6 +67,7 @@ def update_phase(id: int):
         if attr in data:
             setattr(phase, attr, data[attr])
 
+    catalog.bump('phases')
     db.session.commit()
 
     return jsonify({
@@ -67,6 +81,7 @@ def delete_phase(id: int):
 
     phase = Phase.query.get_or_404(id)
     db.session.delete(phase)
+    catalog.bump('phases')
     db.session.commit()
 
     return jsonify({
@@ -1,30 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from ..db import db
-from ..models import Player, Item, PlayerInsignia, PhaseProgress, PlayerItem, Insignia, Battle, ResultType, Phase, utcnow
-from ..auth import token_required, admin_required, get_current_user_id, is_admin
+from ..models import Player, Item, PlayerInsignia, PhaseProgress, PlayerItem, Insignia, Battle, ResultType, Phase, PlayerStats, utcnow
+from ..auth import token_required, admin_required, is_admin, revoke_tokens
+from ..leaderboard import leaderboard
+from ..pagination import paginate, set_next_cursor, stream, wants_stream
+from ..passwords import passwords
+from ..rewards import apply_rewards
+from ..progress import record_completion
+from .. import stats
+from ..http_cache import not_modified, set_cache_headers
+from ..catalog import catalog
+from ..fieldsets import apply_fieldset, parse_fieldset, serializer
 from flask import abort
 
 
 bp = Blueprint('players', __name__, url_prefix='/players')
 
 
-def _check_and_grant_insignias(player: Player):
-    """
-    Verifica e concede conquistas com base na experiência total do jogador.
-    """
-    all_insignias: list[Insignia] = Insignia.query.all()
-    player_insignias_ids: set[int] = {pa.insignia_id for pa in player.insignias}
-
-    for insignia in all_insignias:
-        if player.experience >= insignia.xp_required and insignia.id not in player_insignias_ids:
-            new_player_insignia = PlayerInsignia(
-                player_id = player.id,
-                insignia_id = insignia.id
-            )
-            db.session.add(new_player_insignia)
-            player.coins += insignia.reward_coins
-
-
 @bp.route('/<int:id>/insignia')
 @token_required
 def get_player_main_insignia(id: int):
@@ -53,25 +47,61 @@ def get_player_main_insignia(id: int):
 @bp.route('/')
 @admin_required
 def index():
-    players: list[Player] = Player.query.all()
-    return jsonify({
-        'players': [player.to_dict() for player in players],
-        'total': len(players),
-    })
+    fieldset = parse_fieldset(Player)
+    query = Player.query if fieldset is None else apply_fieldset(Player.query, Player, fieldset, Player.id)
+
+    serialize = serializer(Player, fieldset)
+    if wants_stream():
+        return stream(query, Player.id, serialize = serialize)
+
+    page = paginate(query, Player.id)
+    return set_next_cursor(jsonify({
+        'players': [serialize(player) for player in page.items],
+        'total': len(page.items),
+        'next_cursor': page.next_cursor
+    }), page)
 
 
 @bp.route('/ranking')
 def ranking():
-    players: list[Player] = Player.query.order_by(Player.experience.desc()).all()
-    return jsonify([
-        {
-            'rank': index + 1,
-            'id': player.id,
-            'username': player.username,
-            'experience': player.experience
-        }
-        for index, player in enumerate(players)
-    ])
+
+    offset = max(request.args.get('offset', 0, type = int), 0)
+    limit = request.args.get('limit', current_app.config['RANKING_PAGE_SIZE'], type = int)
+    limit = min(max(limit, 0), current_app.config['RANKING_MAX_PAGE_SIZE'])
+
+    return jsonify(leaderboard.page(offset, limit))
+
+
+@bp.route('/<int:id>/ranking')
+def player_ranking(id: int):
+    """Retorna a posição do jogador no ranking e os seus vizinhos."""
+
+    radius = request.args.get('radius', 5, type = int)
+    radius = min(max(radius, 0), current_app.config['RANKING_MAX_PAGE_SIZE'])
+
+    result = leaderboard.around(id, radius)
+    if result is None:
+        abort(404, description = "Jogador não encontrado no ranking")
+
+    rank, neighbours = result
+    return jsonify({
+        'rank': rank,
+        'ranking': neighbours
+    })
+
+
+@bp.route('/<int:id>/stats')
+@token_required
+def player_stats(id: int):
+    """Estatísticas de batalha do jogador, lidas da tabela materializada ``player_stats``."""
+
+    row = db.session.get(PlayerStats, id)
+    if row is None:
+        # Jogador sem batalhas registradas
+        Player.query.get_or_404(id)
+        row = PlayerStats(player_id = id, battles = 0, wins = 0, losses = 0, flees = 0, reward_coins = 0,
+                          reward_experience = 0, current_streak = 0, best_streak = 0)
+    return jsonify(row.to_dict())
 
 
 @bp.route('/<int:id>/phases', methods=['POST'])
@@ -82,21 +112,14 @@ def complete_phase(id: int):
     if 'phase_id' not in data:
         abort(400, description = "O ID da fase é obrigatório")
 
-    player: Player = Player.query.get_or_404(id)
     phase: Phase = Phase.query.get_or_404(data['phase_id'])
+    player = apply_rewards(id, phase.reward_coins, phase.reward_experience)
+    if player is None:
+        abort(404)
     
-    if phase.reward_coins:
-        player.coins += phase.reward_coins
-    if phase.reward_experience:
-        player.experience += phase.reward_experience
-
-    _check_and_grant_insignias(player)
-    
-    progress = PhaseProgress(
-        player_id = id, phase_id = data['phase_id'], completed=True, completed_at = utcnow()
-    )
-    db.session.add(progress)
+    record_completion(id, phase.id)
     db.session.commit()
+    leaderboard.update(player)
     
     return jsonify({
         'message': f'Fase {phase.name} completada! Recompensas recebidas.',
@@ -120,11 +143,12 @@ def new_player():
     player = Player(
         username = data['username'],
         email = data['email'],
-        password = data['password']
+        password_hash = passwords.hash(data['password'])
     )
 
     db.session.add(player)
     db.session.commit()
+    leaderboard.update(player)
     return player.to_dict(), 201
 
 
@@ -145,15 +169,25 @@ def update_player(id: int):
         player.email = data['email']
 
     if 'password' in data:
-        player.set_password(data['password'])
+        player.password_hash = passwords.hash(data['password'])
 
-    if is_admin(get_current_user_id()):
+    role_changed = False
+    if is_admin():
         for attr in ('experience', 'coins'):
             if attr in data:
                 setattr(player, attr, data[attr])
 
+        if 'role' in data:
+            if data['role'] not in Player.ROLES:
+                abort(400, description=f"Papel inválido. Opções: {', '.join(Player.ROLES)}")
+            role_changed = data['role'] != player.role
+            player.set_role(data['role'])
+
     player.saved_at = utcnow()
     db.session.commit()
+    leaderboard.update(player)
+    if role_changed:
+        revoke_tokens(player)
 
     return jsonify({
         'message': f'Jogador {id} atualizado com sucesso.',
@@ -168,6 +202,8 @@ def delete_player(id: int):
     player = Player.query.get_or_404(id)
     db.session.delete(player)
     db.session.commit()
+    leaderboard.remove(id)
+    revoke_tokens(player, deleted = True)
 
     return jsonify({
         'message': f'Jogador {id} deletado com sucesso.'
@@ -177,17 +213,98 @@ def delete_player(id: int):
 @bp.route('/<int:id>')
 @token_required
 def player(id: int):
+
+    player: Player = Player.query.get_or_404(id)
+
+    # saved_at muda a cada alteração do jogador, inclusive recompensas
+    etag = f'player-{id}-{player.saved_at.isoformat() if player.saved_at else ""}'
+    response = not_modified(etag, 'private, no-cache')
+    if response is not None:
+        return response
+
+    return set_cache_headers(jsonify(player.to_dict()), etag, 'private, no-cache')
+
+
+PROFILE_SECTIONS = ('items', 'insignias', 'phases', 'main_insignia')
+
+
+@bp.route('/<int:id>/profile')
+@token_required
+def player_profile(id: int):
+    """
+    Tudo o que a tela de perfil precisa em uma única requisição: o jogador uma
+    vez e as demais seções referenciando itens, conquistas e fases por id.
+    ``?include=`` escolhe as seções (por padrão, todas).
+    """
+
+    include = request.args.get('include')
+    sections = set(include.split(',')) if include else set(PROFILE_SECTIONS)
+    if not sections <= set(PROFILE_SECTIONS):
+        abort(400, description=f"Seções inválidas. Opções: {', '.join(PROFILE_SECTIONS)}")
+
     player: Player = Player.query.get_or_404(id)
-    return player.to_dict()
+    profile = {'player': player.to_dict()}
+
+    if 'items' in sections:
+        profile['items'] = list(db.session.scalars(
+            select(PlayerItem.item_id).where(PlayerItem.player_id == id).order_by(PlayerItem.item_id)
+        ))
+
+    if 'insignias' in sections or 'main_insignia' in sections:
+        insignias = db.session.execute(
+            select(PlayerInsignia.insignia_id, PlayerInsignia.completed_at)
+            .where(PlayerInsignia.player_id == id)
+            .order_by(PlayerInsignia.insignia_id)
+        ).all()
+
+        if 'insignias' in sections:
+            profile['insignias'] = [
+                {
+                    'insignia_id': insignia_id,
+                    'completed_at': completed_at
+                }
+                for insignia_id, completed_at in insignias
+            ]
+
+        if 'main_insignia' in sections:
+            # O catálogo em cache já tem o xp_required de cada conquista
+            owned_ids = {insignia_id for insignia_id, _ in insignias}
+            owned = [row for row in catalog.entry('insignias').rows if row['id'] in owned_ids]
+            profile['main_insignia'] = max(owned, key=lambda row: row['xp_required'] or 0)['id'] if owned else None
+
+    if 'phases' in sections:
+        phases = db.session.execute(
+            select(PhaseProgress.phase_id, PhaseProgress.completed, PhaseProgress.completions, PhaseProgress.completed_at)
+            .where(PhaseProgress.player_id == id)
+            .order_by(PhaseProgress.phase_id)
+        ).all()
+        profile['phases'] = [
+            {
+                'phase_id': phase_id,
+                'completed': completed,
+                'completions': completions,
+                'completed_at': completed_at
+            }
+            for phase_id, completed, completions, completed_at in phases
+        ]
+
+    return jsonify(profile)
 
 
 @bp.route('/<int:id>/items')
 @token_required
 def player_items(id: int):
-    items: list[Item] = PlayerItem.query.filter_by(player_id = id)
+    fieldset = parse_fieldset(PlayerItem)
+    if fieldset is None:
+        query = PlayerItem.query.options(joinedload(PlayerItem.player), joinedload(PlayerItem.item))
+    else:
+        query = apply_fieldset(PlayerItem.query, PlayerItem, fieldset)
+
+    serialize = serializer(PlayerItem, fieldset)
+    items: list[PlayerItem] = query.filter_by(player_id = id).all()
     return jsonify({
-        'items': [item.to_dict() for item in items],
-        'total': items.count()
+        'items': [serialize(item) for item in items],
+        'total': len(items)
     })
 
 
@@ -229,8 +346,15 @@ def remove_item(id: int, item_id: int):
 def player_insignias(id: int):
 
     Player.query.get_or_404(id)
-    insignias: list[Insignia] = PlayerInsignia.query.filter_by(player_id=id).all()
-    return jsonify([insignia.to_dict() for insignia in insignias])
+    fieldset = parse_fieldset(PlayerInsignia)
+    if fieldset is None:
+        query = PlayerInsignia.query.options(joinedload(PlayerInsignia.player), joinedload(PlayerInsignia.insignia))
+    else:
+        query = apply_fieldset(PlayerInsignia.query, PlayerInsignia, fieldset)
+
+    serialize = serializer(PlayerInsignia, fieldset)
+    insignias: list[PlayerInsignia] = query.filter_by(player_id=id).all()
+    return jsonify([serialize(insignia) for insignia in insignias])
 
 
 @bp.route('/<int:id>/battles', methods=['POST'])
@@ -242,8 +366,6 @@ def record_battle(id: int):
     if 'result' not in data:
         abort(400, description="O resultado ('result') da batalha é obrigatório")
 
-    player: Player = Player.query.get_or_404(id)
-    
     reward_coins = data.get('reward_coins', 0)
     reward_experience = data.get('reward_experience', 0)
 
@@ -257,12 +379,16 @@ def record_battle(id: int):
     
     # Se o jogador venceu, aplica as recompensas e verifica conquistas
     if battle.result == ResultType.WIN:
-        player.coins += reward_coins
-        player.experience += reward_experience
-        _check_and_grant_insignias(player)
+        player = apply_rewards(id, reward_coins, reward_experience)
+        if player is None:
+            abort(404)
+    else:
+        player: Player = Player.query.get_or_404(id)
 
     db.session.add(battle)
+    stats.record_battle(battle)
     db.session.commit()
+    leaderboard.update(player)
 
     return jsonify({
         'message': 'Batalha registrada com sucesso!',
@@ -274,19 +400,45 @@ def record_battle(id: int):
 @token_required
 def player_phases(id: int):
 
-    phases = PhaseProgress.query.filter_by(player_id=id).all()
-    return jsonify({
-        'phases': [phase.to_dict() for phase in phases],
-        'total': len(phases)
-    })
+    fieldset = parse_fieldset(PhaseProgress)
+    if fieldset is None:
+        query = PhaseProgress.query\
+            .options(joinedload(PhaseProgress.player), joinedload(PhaseProgress.phase).joinedload(Phase.boss))
+    else:
+        query = apply_fieldset(PhaseProgress.query, PhaseProgress, fieldset, PhaseProgress.phase_id)
+
+    # Uma linha por fase, na ordem do índice único (player_id, phase_id)
+    query = query.filter_by(player_id=id)
+    serialize = serializer(PhaseProgress, fieldset)
+    if wants_stream():
+        return stream(query, PhaseProgress.phase_id, serialize = serialize)
+
+    page = paginate(query, PhaseProgress.phase_id)
+    return set_next_cursor(jsonify({
+        'phases': [serialize(phase) for phase in page.items],
+        'total': len(page.items),
+        'next_cursor': page.next_cursor
+    }), page)
 
 
 @bp.route('/<int:id>/battles', methods=['GET'])
 @token_required
 def player_battles(id: int):
 
-    battles: list[Battle] = Battle.query.filter_by(player_id=id).order_by(Battle.created_at.desc()).all()
-    return jsonify({
-        'battles': [battle.to_dict() for battle in battles],
-        'total': len(battles)
-    })
+    fieldset = parse_fieldset(Battle)
+    if fieldset is None:
+        query = Battle.query.options(joinedload(Battle.player), joinedload(Battle.boss))
+    else:
+        query = apply_fieldset(Battle.query, Battle, fieldset, Battle.id, Battle.created_at)
+
+    query = query.filter_by(player_id=id)
+    serialize = serializer(Battle, fieldset)
+    if wants_stream():
+        return stream(query, Battle.created_at, Battle.id, serialize = serialize, descending = True)
+
+    page = paginate(query, Battle.created_at, Battle.id, descending = True)
+    return set_next_cursor(jsonify({
+        'battles': [serialize(battle) for battle in page.items],
+        'total': len(page.items),
+        'next_cursor': page.next_cursor
+    }), page)
@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app import create_app
 from app.db import db
+from app.stats import recompute
 from app.models import (
     Player, Item, PlayerItem, Insignia, PlayerInsignia,
     Phase, Boss, PhaseProgress, Battle, ResultType
@@ -67,7 +68,7 @@ def seed_database():
 
         # 5. Criar Jogadores
         players = [
-            Player(username="admin", email="admin@game.com", password="123"),
+            Player(username="admin", email="admin@game.com", password="123", role="admin"),
             Player(username="jogador1", email="player1@mail.com", password="123"),
             Player(username="jogador2", email="player2@mail.com", password="123")
         ]
@@ -86,7 +87,7 @@ def seed_database():
 
         # 8. Registrar Progresso de Fases para jogadores de exemplo
         phase_progress = [
-            PhaseProgress(player_id=players[1].id, phase_id=phases[0].id, completed=True),
+            PhaseProgress(player_id=players[1].id, phase_id=phases[0].id, completed=True, completions=1),
         ]
         db.session.add_all(phase_progress)
         db.session.commit()
@@ -110,6 +111,10 @@ def seed_database():
         db.session.add_all(battles)
         db.session.commit()
 
+        # 10. Estatísticas materializadas das batalhas acima
+        recompute(*{battle.player_id for battle in battles})
+        db.session.commit()
+
         print("Banco de dados populado com sucesso com o novo schema!")
 
 
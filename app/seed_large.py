@@ -0,0 +1,279 @@
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from math import isqrt
+from typing import Iterable, Iterator
+import click
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from werkzeug.security import generate_password_hash
+from .catalog import catalog
+from .db import db
+from .models import (
+    Battle, Boss, Insignia, Item, Phase, PhaseProgress, Player, PlayerInsignia, PlayerItem, ResultType
+)
+from .stats import rebuild_player_stats
+
+
+# Datas geradas terminam aqui, para que a mesma semente gere sempre o mesmo banco
+END_DATE = datetime(2025, 1, 1)
+
+# Peso relativo de cada hora do dia (pico à noite)
+HOUR_WEIGHTS = (2, 1, 1, 1, 1, 1, 2, 3, 4, 4, 5, 5, 6, 6, 6, 6, 7, 8, 10, 12, 13, 12, 8, 4)
+
+
+def _zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    """Pesos acumulados de uma distribuição de Zipf: poucos itens concentram a maior parte."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class LargeDataset:
+    """
+    Gera um banco sintético grande e realista para testes de carga.
+
+    Tudo sai de um único ``random.Random(seed)``. A atividade dos jogadores
+    segue uma distribuição de Zipf (poucos jogadores fazem a maioria das
+    batalhas), os bosses mais avançados aparecem menos e são mais difíceis,
+    e XP, moedas, conquistas, itens e progresso em fases de cada jogador são
+    coerentes com as batalhas geradas. As linhas são inseridas em lotes de
+    ``batch_size``, um commit por lote.
+    """
+
+    def __init__(self, seed: int, batch_size: int) -> None:
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+
+    def _insert(self, model, rows: Iterable[dict], label: str) -> int:
+
+        start = time.perf_counter()
+        total = 0
+        for batch in _batches(rows, self.batch_size):
+            db.session.connection().execute(insert(model.__table__), batch)
+            db.session.commit()
+            total += len(batch)
+        click.echo(f'{label:<16} {total:>10} linhas  {time.perf_counter() - start:7.2f}s')
+        return total
+
+    def bosses(self, count: int) -> list[tuple[int, int]]:
+        """Insere os bosses e retorna (moedas, XP) de recompensa de cada um, por nível."""
+
+        rewards = [(10 + 5 * level, 50 + 25 * level) for level in range(count)]
+        self._insert(Boss, (
+            {'id': level + 1, 'name': f'Boss {level + 1}', 'health': 500 + 100 * level}
+            for level in range(count)
+        ), 'bosses')
+        return rewards
+
+    def phases(self, count: int, bosses: int) -> None:
+        self._insert(Phase, (
+            {
+                'id': i + 1,
+                'name': f'Fase {i + 1}',
+                'boss_id': i % bosses + 1,
+                'reward_coins': 50 + 10 * i,
+                'reward_experience': 200 + 40 * i
+            }
+            for i in range(count)
+        ), 'phases')
+
+    def items(self, count: int) -> None:
+        self._insert(Item, ({'id': i + 1, 'name': f'Item {i + 1}'} for i in range(count)), 'items')
+
+    def insignias(self, count: int) -> None:
+        # xp_required cresce quadraticamente: um jogador com X de XP tem ~sqrt(X / 100) conquistas
+        self._insert(Insignia, (
+            {'id': i, 'name': f'Conquista {i}', 'xp_required': 100 * i * i, 'reward_coins': 10 * i}
+            for i in range(1, count + 1)
+        ), 'insignias')
+
+    def players(self, count: int, password_hash: str) -> None:
+        self._insert(Player, (
+            {
+                'id': i,
+                'username': 'admin' if i == 1 else f'player{i:07d}',
+                'email': f'player{i}@load.test',
+                'password_hash': password_hash,
+                'experience': 0,
+                'coins': 0,
+                'role': 'admin' if i == 1 else 'player',
+                'token_version': 0,
+                'created_at': END_DATE - timedelta(days = 400 + self.rng.random() * 365),
+                'saved_at': END_DATE
+            }
+            for i in range(1, count + 1)
+        ), 'players')
+
+    def battles(self, count: int, players: int, boss_rewards: list[tuple[int, int]]) -> tuple[list[int], list[int], list[int]]:
+        """Insere as batalhas e retorna batalhas, XP e moedas ganhas por jogador (índice = id)."""
+
+        rng = self.rng
+        # Os jogadores mais ativos ficam espalhados pelos ids
+        ranking = list(range(1, players + 1))
+        rng.shuffle(ranking)
+        player_weights = _zipf_cum_weights(players, 1.1)
+        boss_weights = _zipf_cum_weights(len(boss_rewards), 0.8)
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+
+        battle_counts = [0] * (players + 1)
+        experience = [0] * (players + 1)
+        coins = [0] * (players + 1)
+
+        def rows() -> Iterator[dict]:
+            for chunk_start in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - chunk_start)
+                player_ids = [ranking[i] for i in rng.choices(range(players), cum_weights = player_weights, k = size)]
+                levels = rng.choices(range(len(boss_rewards)), cum_weights = boss_weights, k = size)
+                hours = rng.choices(range(24), cum_weights = hour_weights, k = size)
+
+                for player_id, level, hour in zip(player_ids, levels, hours):
+                    # Bosses mais avançados: menos vitórias e mais fugas
+                    difficulty = level / len(boss_rewards)
+                    roll = rng.random()
+                    if roll < 0.75 - 0.5 * difficulty:
+                        result = ResultType.WIN
+                    elif roll < 0.9 - 0.2 * difficulty:
+                        result = ResultType.LOSS
+                    else:
+                        result = ResultType.FLEE
+
+                    reward_coins, reward_experience = boss_rewards[level]
+                    if result == ResultType.WIN:
+                        reward_coins += rng.randrange(reward_coins // 2 + 1)
+                        reward_experience += rng.randrange(reward_experience // 2 + 1)
+                        experience[player_id] += reward_experience
+                        coins[player_id] += reward_coins
+                    else:
+                        reward_coins = reward_experience = 0
+                    battle_counts[player_id] += 1
+
+                    yield {
+                        'player_id': player_id,
+                        'boss_id': level + 1,
+                        'result': result,
+                        'reward_coins': reward_coins,
+                        'reward_experience': reward_experience,
+                        'created_at': END_DATE - timedelta(days = 1 + rng.randrange(365)) + timedelta(hours = hour, seconds = rng.randrange(3600))
+                    }
+
+        self._insert(Battle, rows(), 'battles')
+        return battle_counts, experience, coins
+
+    def player_insignias(self, experience: list[int], coins: list[int], count: int) -> None:
+        """Concede as conquistas cujo XP cada jogador atingiu e soma as moedas de bônus."""
+
+        def rows() -> Iterator[dict]:
+            for player_id in range(1, len(experience)):
+                owned = min(isqrt(experience[player_id] // 100), count)
+                # Bônus das conquistas 1..owned: 10 * (1 + ... + owned)
+                coins[player_id] += 5 * owned * (owned + 1)
+                completed_at = END_DATE - timedelta(days = self.rng.randrange(365))
+                for insignia_id in range(1, owned + 1):
+                    yield {'player_id': player_id, 'insignia_id': insignia_id, 'completed_at': completed_at}
+
+        self._insert(PlayerInsignia, rows(), 'player_insignias')
+
+    def player_items(self, players: int, items: int, mean: float) -> None:
+
+        rng = self.rng
+        weights = _zipf_cum_weights(items, 1.0)
+
+        def rows() -> Iterator[dict]:
+            for player_id in range(1, players + 1):
+                owned = set(rng.choices(range(1, items + 1), cum_weights = weights, k = int(rng.expovariate(1 / mean))))
+                for item_id in sorted(owned):
+                    yield {'player_id': player_id, 'item_id': item_id}
+
+        self._insert(PlayerItem, rows(), 'player_items')
+
+    def phase_progress(self, battle_counts: list[int], phases: int) -> None:
+        """Jogadores mais ativos avançaram mais fases, em ordem."""
+
+        rng = self.rng
+
+        def rows() -> Iterator[dict]:
+            for player_id in range(1, len(battle_counts)):
+                reached = min(phases, battle_counts[player_id] // 3)
+                for phase_id in range(1, reached + 1):
+                    first = END_DATE - timedelta(days = 365 - phase_id % 365, seconds = rng.randrange(86400))
+                    yield {
+                        'player_id': player_id,
+                        'phase_id': phase_id,
+                        'completed': True,
+                        'completions': 1 + int(rng.expovariate(1.0)),
+                        'first_completed_at': first,
+                        'completed_at': first + timedelta(days = rng.randrange(30))
+                    }
+
+        self._insert(PhaseProgress, rows(), 'phase_progress')
+
+    def player_totals(self, experience: list[int], coins: list[int]) -> None:
+        """Grava XP e moedas acumulados por jogador (UPDATE em lote pela chave primária)."""
+
+        start = time.perf_counter()
+        rows = (
+            {'id': player_id, 'experience': experience[player_id], 'coins': coins[player_id]}
+            for player_id in range(1, len(experience))
+        )
+        for batch in _batches(rows, self.batch_size):
+            db.session.execute(update(Player), batch)
+            db.session.commit()
+        click.echo(f'{"player totals":<16} {len(experience) - 1:>10} linhas  {time.perf_counter() - start:7.2f}s')
+
+
+@click.command('seed-large')
+@click.option('--players', default = 200_000, show_default = True)
+@click.option('--battles', default = 2_000_000, show_default = True)
+@click.option('--bosses', default = 100, show_default = True)
+@click.option('--phases', default = 300, show_default = True)
+@click.option('--items', default = 5_000, show_default = True)
+@click.option('--insignias', default = 1_000, show_default = True)
+@click.option('--items-per-player', default = 3.0, show_default = True, help = 'Média de itens por jogador.')
+@click.option('--seed', default = 42, show_default = True)
+@click.option('--batch-size', default = 20_000, show_default = True, help = 'Linhas por INSERT em lote (e por transação).')
+@click.option('--password', default = '123', show_default = True, help = 'Senha de todos os jogadores (hash calculado uma única vez).')
+@click.option('--reset', is_flag = True, help = 'Apaga e recria todas as tabelas antes de gerar os dados.')
+def seed_large_command(players: int, battles: int, bosses: int, phases: int, items: int, insignias: int,
+                       items_per_player: float, seed: int, batch_size: int, password: str, reset: bool):
+    """Gera um banco sintético grande e determinístico para testes de carga."""
+
+    if reset:
+        db.drop_all()
+        db.create_all()
+    elif db.session.scalar(select(func.count(Player.id))):
+        raise click.ClickException('O banco já tem jogadores; use --reset para recriá-lo.')
+
+    start = time.perf_counter()
+    password_hash = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+    dataset = LargeDataset(seed, batch_size)
+
+    boss_rewards = dataset.bosses(bosses)
+    dataset.phases(phases, bosses)
+    dataset.items(items)
+    dataset.insignias(insignias)
+    dataset.players(players, password_hash)
+    battle_counts, experience, coins = dataset.battles(battles, players, boss_rewards)
+    dataset.player_insignias(experience, coins, insignias)
+    dataset.player_items(players, items, items_per_player)
+    dataset.phase_progress(battle_counts, phases)
+    dataset.player_totals(experience, coins)
+
+    stats_start = time.perf_counter()
+    total = rebuild_player_stats(batch_size)
+    catalog.bump('bosses', 'items', 'phases', 'insignias')
+    db.session.commit()
+    click.echo(f'{"player_stats":<16} {total:>10} linhas  {time.perf_counter() - stats_start:7.2f}s')
+
+    click.echo(f'Concluído em {time.perf_counter() - start:.1f}s (semente {seed}). Login: admin / {password}')
@@ -0,0 +1,159 @@
+import time
+from datetime import datetime
+from itertools import groupby
+from typing import Iterable
+import click
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.sql import Select
+from .db import db, dialect_insert
+from .models import Battle, PlayerStats, ResultType, utcnow
+
+
+class BattleSummary:
+    """
+    Resumo de uma sequência de batalhas de um jogador, em ordem cronológica.
+
+    Além dos totais, guarda as sequências de vitórias inicial (``lead``),
+    final (``run``) e a maior (``best``), o suficiente para combinar o
+    resumo com estatísticas já gravadas sem reler o histórico.
+    """
+
+    def __init__(self) -> None:
+        self.battles = self.wins = self.losses = self.flees = 0
+        self.reward_coins = self.reward_experience = 0
+        self.lead = self.run = self.best = 0
+        self.last_battle_at: datetime | None = None
+
+    def add(self, result: ResultType, reward_coins: int, reward_experience: int, created_at: datetime | None = None) -> None:
+
+        self.battles += 1
+        if result == ResultType.WIN:
+            self.wins += 1
+            self.reward_coins += reward_coins or 0
+            self.reward_experience += reward_experience or 0
+            if self.lead == self.battles - 1:
+                self.lead += 1
+            self.run += 1
+            self.best = max(self.best, self.run)
+        else:
+            if result == ResultType.LOSS:
+                self.losses += 1
+            elif result == ResultType.FLEE:
+                self.flees += 1
+            self.run = 0
+
+        if created_at is not None and (self.last_battle_at is None or created_at > self.last_battle_at):
+            self.last_battle_at = created_at
+
+    def row(self, player_id: int) -> dict:
+        return {
+            'player_id': player_id,
+            'battles': self.battles,
+            'wins': self.wins,
+            'losses': self.losses,
+            'flees': self.flees,
+            'reward_coins': self.reward_coins,
+            'reward_experience': self.reward_experience,
+            'current_streak': self.run,
+            'best_streak': self.best,
+            'last_battle_at': self.last_battle_at or utcnow()
+        }
+
+
+def record_battles(player_id: int, summary: BattleSummary) -> None:
+    """
+    Soma as batalhas de ``summary`` às estatísticas do jogador com um único
+    upsert. As batalhas devem ser mais recentes que as já contadas.
+    """
+
+    if not summary.battles:
+        return
+
+    greatest = func.greatest if db.session.get_bind().dialect.name == 'postgresql' else func.max
+    row = summary.row(player_id)
+    if summary.wins == summary.battles:
+        current_streak = PlayerStats.current_streak + summary.battles
+    else:
+        current_streak = summary.run
+
+    statement = dialect_insert(PlayerStats).values(**row)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements = [PlayerStats.player_id],
+        set_ = {
+            'battles': PlayerStats.battles + summary.battles,
+            'wins': PlayerStats.wins + summary.wins,
+            'losses': PlayerStats.losses + summary.losses,
+            'flees': PlayerStats.flees + summary.flees,
+            'reward_coins': PlayerStats.reward_coins + summary.reward_coins,
+            'reward_experience': PlayerStats.reward_experience + summary.reward_experience,
+            'current_streak': current_streak,
+            'best_streak': greatest(PlayerStats.best_streak, PlayerStats.current_streak + summary.lead, summary.best),
+            'last_battle_at': row['last_battle_at']
+        }
+    ))
+
+
+def record_battle(battle: Battle) -> None:
+
+    summary = BattleSummary()
+    summary.add(battle.result, battle.reward_coins, battle.reward_experience, battle.created_at)
+    record_battles(battle.player_id, summary)
+
+
+def _summarize(statement: Select, chunk_size: int) -> Iterable[dict]:
+    """Percorre as batalhas de ``statement`` por jogador e gera uma linha de estatísticas para cada um."""
+
+    rows = db.session.execute(
+        statement.order_by(Battle.player_id, Battle.created_at, Battle.id).execution_options(yield_per = chunk_size)
+    )
+    for player_id, battles in groupby(rows, key = lambda row: row.player_id):
+        summary = BattleSummary()
+        for battle in battles:
+            summary.add(battle.result, battle.reward_coins, battle.reward_experience, battle.created_at)
+        yield summary.row(player_id)
+
+
+def _battle_columns() -> Select:
+    return select(Battle.player_id, Battle.result, Battle.reward_coins, Battle.reward_experience, Battle.created_at)
+
+
+def recompute(*player_ids: int) -> None:
+    """
+    Recalcula as estatísticas dos jogadores a partir do histórico, para
+    quando uma batalha antiga é alterada ou removida.
+    """
+
+    db.session.execute(delete(PlayerStats).where(PlayerStats.player_id.in_(player_ids)))
+    rows = list(_summarize(_battle_columns().where(Battle.player_id.in_(player_ids)), 1000))
+    if rows:
+        db.session.execute(insert(PlayerStats), rows)
+
+
+def rebuild_player_stats(chunk_size: int) -> int:
+    """Recalcula ``player_stats`` de todos os jogadores; retorna quantas linhas foram gravadas."""
+
+    db.session.execute(delete(PlayerStats))
+
+    total = 0
+    batch: list[dict] = []
+    for row in _summarize(_battle_columns(), chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            db.session.execute(insert(PlayerStats), batch)
+            total += len(batch)
+            batch.clear()
+    if batch:
+        db.session.execute(insert(PlayerStats), batch)
+        total += len(batch)
+    return total
+
+
+@click.command('rebuild-player-stats')
+@click.option('--chunk-size', default = 5000, show_default = True, help = 'Batalhas lidas e linhas gravadas por lote.')
+def rebuild_player_stats_command(chunk_size: int):
+    """Recalcula ``player_stats`` de todos os jogadores a partir da tabela ``battle``."""
+
+    start = time.perf_counter()
+    total = rebuild_player_stats(chunk_size)
+    db.session.commit()
+    click.echo(f'player_stats: {total} jogador(es) em {time.perf_counter() - start:.2f}s')
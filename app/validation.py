@@ -0,0 +1,6 @@
+from typing import Any
+
+
+def is_int(value: Any) -> bool:
+    """Indica se um valor vindo de JSON é um inteiro (``bool`` é subclasse de ``int``, mas não conta)."""
+    return isinstance(value, int) and not isinstance(value, bool)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,3 +12,108 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'app.db')
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Perfil de armazenamento aplicado ao engine (ver STORAGE_PROFILES)
+    STORAGE_PROFILE = os.environ.get('STORAGE_PROFILE') or 'default'
+
+    # PRAGMAs aplicados a cada nova conexão SQLite e opções do engine de cada perfil.
+    # O perfil 'production' usa WAL para que escritas não bloqueiem leitores
+    # entre os workers do gunicorn.
+    STORAGE_PROFILES = {
+        'default': {
+            'pragmas': {},
+            'engine_options': {}
+        },
+        'production': {
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY'
+            },
+            'engine_options': {
+                'pool_size': 8,
+                'max_overflow': 8,
+                'pool_timeout': 10,
+                'pool_recycle': 3600,
+                'connect_args': {'timeout': 5}
+            }
+        }
+    }
+
+    # Quantidade de tokens JWT já verificados mantidos em cache (0 = desativado)
+    AUTH_TOKEN_CACHE_SIZE = 4096
+    # Segundos que um token verificado fica em cache
+    AUTH_TOKEN_CACHE_TTL = 60
+    # Segundos até a lista de tokens revogados ser recarregada do banco; uma
+    # revogação feita em outro worker demora até isso para valer aqui
+    AUTH_REVOCATION_TTL = 60
+
+    # Método do werkzeug com todos os parâmetros explícitos, para que
+    # mudanças de custo sejam detectadas e as senhas refeitas no login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    # Processos dedicados ao hash de senhas (0 = na thread da requisição)
+    PASSWORD_POOL_SIZE = int(os.environ.get('PASSWORD_POOL_SIZE', 2))
+    PASSWORD_POOL_QUEUE_LIMIT = 16
+    PASSWORD_POOL_TIMEOUT = 10
+
+    # Segundos até o índice do ranking ser recarregado do banco (None = nunca)
+    LEADERBOARD_TTL = 60
+
+    # Segundos que clientes e proxies podem reutilizar as listagens de catálogo
+    CATALOG_CACHE_MAX_AGE = 30
+
+    PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    STREAM_CHUNK_SIZE = 1000
+
+    # Máximo de batalhas aceitas por requisição em /battles/batch
+    BATTLE_BATCH_MAX_SIZE = 1000
+
+    RANKING_PAGE_SIZE = 100
+    RANKING_MAX_PAGE_SIZE = 1000
+
+    # Codificações de resposta em ordem de preferência; brotli ('br') e zstd
+    # só são usadas se os pacotes 'brotli' e 'zstandard' estiverem instalados
+    COMPRESSION_ALGORITHMS = ('zstd', 'br', 'gzip')
+    COMPRESSION_LEVELS = {
+        'gzip': int(os.environ.get('COMPRESSION_LEVEL', 6)),
+        'br': 4,
+        'zstd': 3
+    }
+    # Respostas menores que isso (em bytes) vão sem compressão
+    COMPRESSION_MIN_SIZE = 1024
+    COMPRESSION_MIMETYPES = ('application/json', 'application/x-ndjson')
+
+    # Linhas de battle lidas por lote nas análises por boss
+    ANALYTICS_CHUNK_SIZE = 50000
+    ANALYTICS_PERCENTILES = (50, 90, 99)
+
+    # Requisições mais lentas que isso (ms) ou com mais consultas que isso
+    # vão para o log de requisições lentas (logger 'app.slow_requests')
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 500))
+    SLOW_REQUEST_QUERY_COUNT = 50
+    # Quantas das consultas mais lentas de cada requisição guardar
+    QUERY_PROFILE_TOP = 5
+    # Envia X-Query-Count/X-Query-Time também fora de debug e testes (usado por 'flask bench run')
+    QUERY_PROFILE_HEADERS = os.environ.get('QUERY_PROFILE_HEADERS', '0') != '0'
+
+    # Métricas em /metrics (desligadas por padrão). Cada worker do gunicorn
+    # grava em arquivos próprios em METRICS_DIR, que deve ser limpo a cada deploy
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') != '0'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'app-metrics')
+    # O /metrics só responde para 'Authorization: Bearer <METRICS_TOKEN>' ou,
+    # se configurados, para os IPs de METRICS_ALLOWED_IPS (separados por vírgula).
+    # Atrás de um proxy reverso todas as requisições chegam com o IP do proxy
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = tuple(ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip())
+    # Limites (em segundos) das faixas do histograma de latência
+    METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    # Profile sob demanda (?profile=cprofile|sample, só administradores; desligado por padrão)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '0') != '0'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'app-profiles')
+    # Segundos entre amostras do profiler 'sample'
+    PROFILE_SAMPLE_INTERVAL = 0.001
@@ -0,0 +1,79 @@
+import pytest
+from config import Config
+from app import create_app
+from app.analytics import boss_analytics
+from app.auth import issue_token
+from app.catalog import catalog
+from app.db import db
+from app.insignia_table import insignia_table
+from app.leaderboard import leaderboard
+from app.models import Player
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Configuração dos testes; um módulo pode sobrescrever esta fixture para ligar outras opções."""
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        METRICS_DIR = str(tmp_path / 'metrics')
+        PROFILE_DIR = str(tmp_path / 'profiles')
+        # Hash barato, na própria thread
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+        PASSWORD_POOL_SIZE = 0
+
+    return TestConfig
+
+
+@pytest.fixture
+def app(config):
+
+    app = create_app(config)
+
+    # Os caches em memória são globais do processo e cada teste usa um banco novo
+    leaderboard.invalidate()
+    insignia_table.invalidate()
+    boss_analytics.invalidate()
+    catalog._entries.clear()
+
+    # Nenhum contexto fica ativo durante o teste: cada requisição do test client
+    # precisa do seu próprio (``g`` e sessão do banco) como em produção
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_player(app):
+    """Cria e grava um jogador (senha '123'); o objeto retornado fica desanexado da sessão."""
+
+    def create(username: str, role: str = 'player', **columns) -> Player:
+        with app.app_context():
+            player = Player(username, f'{username}@test.local', '123', role = role)
+            for name, value in columns.items():
+                setattr(player, name, value)
+            db.session.add(player)
+            db.session.commit()
+            db.session.refresh(player)
+            db.session.expunge(player)
+        return player
+
+    return create
+
+
+@pytest.fixture
+def auth_headers(app):
+
+    def headers(player: Player) -> dict:
+        with app.app_context():
+            return {'x-access-token': issue_token(player)}
+
+    return headers
@@ -0,0 +1,66 @@
+import random
+import numpy as np
+from app.analytics import BossAnalytics
+from app.db import db
+from app.models import Battle, Boss, ResultType
+
+
+def _seed(app, player_id: int) -> list[dict]:
+
+    rng = random.Random(7)
+    rows = [
+        {
+            'player_id': player_id,
+            'boss_id': rng.randint(1, 3),
+            'result': rng.choice(list(ResultType)),
+            'reward_coins': rng.randint(0, 40),
+            'reward_experience': rng.randint(0, 400)
+        }
+        for _ in range(500)
+    ]
+    with app.app_context():
+        db.session.add_all([Boss(name = f'boss-{i}', health = 100) for i in range(1, 4)])
+        db.session.flush()
+        db.session.execute(db.insert(Battle), rows)
+        db.session.commit()
+    return rows
+
+
+def test_chunked_percentiles_match_numpy(app, create_player):
+
+    rows = _seed(app, create_player('p1').id)
+    app.config['ANALYTICS_CHUNK_SIZE'] = 7
+    with app.app_context():
+        result = BossAnalytics().compute()
+
+    assert result['battles'] == len(rows)
+    for boss in result['bosses']:
+        battles = [row for row in rows if row['boss_id'] == boss['boss_id']]
+        wins = [row for row in battles if row['result'] == ResultType.WIN]
+        assert boss['battles'] == len(battles)
+        assert boss['wins'] == len(wins)
+        assert sum(boss['battles_by_hour']) == len(battles)
+        for field in ('reward_coins', 'reward_experience'):
+            expected = np.percentile([row[field] for row in wins], app.config['ANALYTICS_PERCENTILES'])
+            assert list(boss[field].values()) == [round(float(value), 2) for value in expected]
+
+
+def test_battle_edit_refreshes_analytics_of_other_workers(app, client, create_player):
+
+    player = create_player('p1')
+    _seed(app, player.id)
+    with app.app_context():
+        battle = db.session.scalars(db.select(Battle).where(Battle.result != ResultType.FLEE)).first()
+        battle_id, boss_id = battle.id, battle.boss_id
+
+    # Cache de outro worker, que não recebe a requisição de edição
+    worker = BossAnalytics()
+
+    def flees() -> int:
+        with app.app_context():
+            return next(boss['flees'] for boss in worker.get()['bosses'] if boss['boss_id'] == boss_id)
+
+    before = flees()
+    # Não muda a contagem nem o maior id de battle
+    client.put(f'/battles/{battle_id}', json = {'result': 'flee'})
+    assert flees() == before + 1
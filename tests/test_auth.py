@@ -0,0 +1,55 @@
+def test_token_is_authorized_without_player_lookup(app, client, create_player, auth_headers):
+
+    # Sem o cache de tokens, toda requisição verifica o token do zero
+    app.config['AUTH_TOKEN_CACHE_SIZE'] = 0
+    player = create_player('p1')
+    headers = auth_headers(player)
+    # Cria a linha de player_stats e carrega a lista de revogações do processo
+    client.post(f'/players/{player.id}/battles', json = {'result': 'loss'}, headers = headers)
+
+    response = client.get(f'/players/{player.id}/stats', headers = headers)
+    assert response.status_code == 200
+    # Só a consulta da própria rota
+    assert response.headers['X-Query-Count'] == '1'
+
+
+def test_role_change_revokes_previous_tokens(client, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    player = create_player('p1')
+    old_headers = auth_headers(player)
+    assert client.get(f'/players/{player.id}', headers = old_headers).status_code == 200
+
+    response = client.put(f'/players/{player.id}', json = {'role': 'admin'}, headers = auth_headers(admin))
+    assert response.status_code == 200
+
+    assert client.get(f'/players/{player.id}', headers = old_headers).status_code == 401
+    login = client.post('/auth/login', json = {'username': 'p1', 'password': '123'}).get_json()
+    assert client.get('/players/', headers = {'x-access-token': login['token']}).status_code == 200
+
+
+def test_deleted_admin_token_is_rejected(app, client, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    admin2 = create_player('admin2', role = 'admin')
+    other = create_player('p1')
+    old_headers = auth_headers(admin2)
+    assert client.get('/players/', headers = old_headers).status_code == 200
+
+    assert client.delete(f'/players/{admin2.id}', headers = auth_headers(admin)).status_code == 200
+    assert client.get('/players/', headers = old_headers).status_code == 401
+    assert client.delete(f'/players/{other.id}', headers = old_headers).status_code == 401
+
+
+def test_deleted_player_token_is_rejected_by_other_workers(app, client, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    player = create_player('p1')
+    headers = auth_headers(player)
+    assert client.get(f'/players/{player.id}', headers = headers).status_code == 200
+
+    assert client.delete(f'/players/{player.id}', headers = auth_headers(admin)).status_code == 200
+    # Outro worker: lista de revogações e cache de tokens próprios, sem a revogação local
+    app.extensions.pop('auth_revocations')
+    app.extensions.pop('auth_token_cache')
+    assert client.get(f'/players/{player.id}/stats', headers = headers).status_code == 401
@@ -0,0 +1,41 @@
+def test_batch_reports_invalid_ids_per_item(client, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    player = create_player('p1')
+    response = client.post('/battles/batch', headers = auth_headers(admin), json = {'battles': [
+        {'player_id': [1], 'result': 'win'},
+        {'player_id': str(player.id), 'result': 'win'},
+        {'player_id': True, 'result': 'win'},
+        {'player_id': player.id, 'result': 'win', 'boss_id': {'id': 1}},
+        {'player_id': 9999, 'result': 'win'},
+        {'player_id': player.id, 'result': 'loss'}
+    ]})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (1, 5)
+
+    statuses = [result['status'] for result in body['results']]
+    assert statuses == ['error'] * 5 + ['created']
+    for result in body['results'][:4]:
+        assert 'inteiros' in result['message']
+    assert body['results'][4]['message'] == 'Jogador 9999 não encontrado'
+
+
+def test_batch_rejects_non_integer_rewards(client, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    player = create_player('p1')
+    response = client.post('/battles/batch', headers = auth_headers(admin), json = {'battles': [
+        {'player_id': player.id, 'result': 'win', 'reward_coins': 1.9},
+        {'player_id': player.id, 'result': 'win', 'reward_experience': '10'},
+        {'player_id': player.id, 'result': 'win', 'reward_coins': True},
+        {'player_id': player.id, 'result': 'win', 'reward_experience': None}
+    ]})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['created'] == 0
+    for result in body['results']:
+        assert result['status'] == 'error'
+        assert 'reward_coins' in result['message']
@@ -0,0 +1,23 @@
+from app.catalog import catalog
+from app.db import db
+from app.models import CatalogVersion
+
+
+def test_bump_creates_then_increments_version(app):
+
+    with app.app_context():
+        catalog.bump('items')
+        db.session.commit()
+        catalog.bump('items', 'bosses')
+        db.session.commit()
+        versions = dict(db.session.execute(db.select(CatalogVersion.name, CatalogVersion.version)).all())
+
+    assert versions == {'items': 2, 'bosses': 1}
+
+
+def test_catalog_listing_sees_new_rows(client):
+
+    assert client.get('/items/').get_json()['items'] == []
+
+    client.post('/items/', json = {'name': 'Espada'})
+    assert [item['name'] for item in client.get('/items/').get_json()['items']] == ['Espada']
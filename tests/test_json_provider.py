@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture
+def player(create_player):
+    return create_player('joão_ç')
+
+
+def test_orjson_writes_non_ascii_as_utf8(app, client, player, auth_headers):
+
+    pytest.importorskip('orjson')
+    assert app.json.use_orjson
+    body = client.get(f'/players/{player.id}', headers = auth_headers(player)).get_data()
+    assert '"username":"joão_ç"'.encode() in body
+
+
+def test_stdlib_fallback_escapes_non_ascii(app, client, player, auth_headers):
+
+    app.json.use_orjson = False
+    body = client.get(f'/players/{player.id}', headers = auth_headers(player)).get_data()
+    assert b'"username":"jo\\u00e3o_\\u00e7"' in body
@@ -0,0 +1,67 @@
+import os
+import pytest
+from config import Config
+from app.metrics import metrics
+
+
+TOKEN = {'Authorization': 'Bearer segredo'}
+
+
+@pytest.fixture
+def config(config):
+
+    class MetricsConfig(config):
+        METRICS_ENABLED = True
+        METRICS_TOKEN = 'segredo'
+        PROFILER_ENABLED = True
+
+    return MetricsConfig
+
+
+def test_metrics_are_disabled_by_default():
+    assert not Config.METRICS_ENABLED
+
+
+def test_metrics_require_token_by_default(client):
+
+    # Nem o próprio host passa sem token: um proxy reverso local teria esse IP
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers = {'Authorization': 'Bearer errado'}).status_code == 403
+    assert client.get('/metrics', headers = TOKEN).status_code == 200
+
+
+def test_metrics_allowed_ips_are_opt_in(app, client):
+
+    app.config['METRICS_ALLOWED_IPS'] = ('10.0.0.5',)
+    assert client.get('/metrics', environ_base = {'REMOTE_ADDR': '10.0.0.5'}).status_code == 200
+    assert client.get('/metrics', environ_base = {'REMOTE_ADDR': '10.0.0.6'}).status_code == 403
+
+
+def test_profiler_routes_have_their_own_metrics(client, create_player, auth_headers):
+
+    client.get('/profiles/nao-existe.prof', headers = auth_headers(create_player('admin', role = 'admin')))
+    body = client.get('/metrics', headers = TOKEN).get_data(as_text = True)
+    assert 'http_requests_total{endpoint="get_profile"} 1' in body
+    assert '<unmatched>' not in body
+
+
+def test_files_of_dead_workers_are_archived(app, client):
+
+    client.get('/battles/')
+    pid = os.fork()
+    if pid == 0:
+        # Worker que atende uma requisição e termina
+        metrics.observe('routes.battles.list_battles', 200, 0.01)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    body = client.get('/metrics', headers = TOKEN).get_data(as_text = True)
+    assert 'http_requests_total{endpoint="battles.list_battles"} 2' in body
+
+    files = os.listdir(app.config['METRICS_DIR'])
+    assert 'archive.metrics' in files
+    assert not any(name.startswith(f'{pid}-') for name in files)
+
+    # Os contadores do worker encerrado continuam somados nas próximas leituras
+    body = client.get('/metrics', headers = TOKEN).get_data(as_text = True)
+    assert 'http_requests_total{endpoint="battles.list_battles"} 2' in body
@@ -0,0 +1,43 @@
+import base64
+import json
+import pytest
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize('cursor', [
+    _cursor([5, 1]),
+    _cursor(['2024-01-01T00:00:00', 'x']),
+    _cursor(['2024-01-01T00:00:00', True]),
+    _cursor(['não é data', 1]),
+    _cursor({'a': 1}),
+    _cursor(['2024-01-01T00:00:00']),
+    'não-é-base64'
+])
+def test_invalid_cursor_is_rejected(client, create_player, auth_headers, cursor):
+
+    player = create_player('p1')
+    response = client.get(f'/players/{player.id}/battles', query_string = {'cursor': cursor}, headers = auth_headers(player))
+    assert response.status_code == 400
+
+
+def test_catalog_rejects_cursor_of_wrong_type(client):
+    assert client.get('/items/', query_string = {'cursor': _cursor(['1'])}).status_code == 400
+
+
+def test_valid_cursor_continues_listing(client, create_player, auth_headers):
+
+    player = create_player('p1')
+    headers = auth_headers(player)
+    for _ in range(3):
+        client.post(f'/players/{player.id}/battles', json = {'result': 'loss'}, headers = headers)
+
+    first = client.get(f'/players/{player.id}/battles', query_string = {'limit': 2}, headers = headers)
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get(f'/players/{player.id}/battles', query_string = {'limit': 2, 'cursor': cursor}, headers = headers)
+
+    assert second.status_code == 200
+    ids = [battle['id'] for battle in first.get_json()['battles'] + second.get_json()['battles']]
+    assert sorted(ids, reverse = True) == ids and len(set(ids)) == 3
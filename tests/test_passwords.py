@@ -0,0 +1,26 @@
+import time
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+from app.passwords import PasswordHasher
+
+
+def test_timed_out_task_keeps_its_slot_until_it_finishes(app):
+
+    app.config.update(PASSWORD_POOL_SIZE = 1, PASSWORD_POOL_QUEUE_LIMIT = 0, PASSWORD_POOL_TIMEOUT = 0.05)
+    hasher = PasswordHasher()
+    with app.app_context():
+        with pytest.raises(ServiceUnavailable, match = 'timed out'):
+            hasher._run(time.sleep, 0.5)
+
+        # A tarefa ainda roda no pool: a vaga continua ocupada
+        assert hasher.queue_depth == 1
+        with pytest.raises(ServiceUnavailable, match = 'queue is full'):
+            hasher._run(time.sleep, 0)
+
+        deadline = time.monotonic() + 5
+        while hasher.queue_depth and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert hasher.queue_depth == 0
+        assert hasher._run(pow, 2, 10) == 1024
+
+    hasher._executor.shutdown()
@@ -0,0 +1,26 @@
+import pytest
+from config import Config
+
+
+@pytest.fixture
+def config(config):
+
+    class ProfilerConfig(config):
+        PROFILER_ENABLED = True
+
+    return ProfilerConfig
+
+
+def test_profiler_is_disabled_by_default():
+    assert not Config.PROFILER_ENABLED
+
+
+def test_profile_text_rejects_unknown_sort(client, create_player, auth_headers):
+
+    headers = auth_headers(create_player('admin', role = 'admin'))
+    name = client.get('/battles/', query_string = {'profile': 'cprofile'}, headers = headers).headers['X-Profile']
+
+    url = f'/profiles/{name}'
+    assert client.get(url, query_string = {'format': 'text', 'sort': 'calls'}, headers = headers).status_code == 200
+    for sort in ('não-existe', 'cumulative; rm', ''):
+        assert client.get(url, query_string = {'format': 'text', 'sort': sort}, headers = headers).status_code == 400
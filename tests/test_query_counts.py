@@ -0,0 +1,35 @@
+import pytest
+from app.db import db
+from app.models import Battle, Boss, ResultType
+
+
+def _add_battles(app, player_id: int, count: int) -> None:
+
+    with app.app_context():
+        # Um boss diferente por batalha: sem carregamento antecipado, cada um custaria uma consulta
+        for i in range(count):
+            boss = Boss(name = f'boss-{player_id}-{i}', health = 100)
+            db.session.add(boss)
+            db.session.add(Battle(player_id = player_id, boss = boss, result = ResultType.WIN, reward_coins = 1, reward_experience = 1))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('path', ['/battles/', '/players/{id}/battles'])
+def test_battle_listing_query_count_does_not_grow_with_rows(app, client, create_player, auth_headers, path):
+
+    player = create_player('p1')
+    headers = auth_headers(player)
+    url = path.format(id = player.id)
+    # Aquece os caches por processo (como o de tokens), que não dependem da listagem
+    client.get(url, headers = headers)
+
+    _add_battles(app, player.id, 1)
+    one = client.get(url, headers = headers)
+
+    _add_battles(app, player.id, 25)
+    many = client.get(url, headers = headers)
+
+    assert one.status_code == many.status_code == 200
+    body = many.get_json()
+    assert len(body['battles'] if isinstance(body, dict) else body) == 26
+    assert int(many.headers['X-Query-Count']) == int(one.headers['X-Query-Count'])
@@ -0,0 +1,94 @@
+import re
+import pytest
+from sqlalchemy import event
+from app.db import db
+from app.models import Battle, Boss, Insignia, Item, Phase, PlayerItem, ResultType
+
+
+# Tabelas que crescem com o uso e nunca devem ser percorridas inteiras nos caminhos críticos
+FULL_SCAN = re.compile(r'^SCAN (battle|phase_progress|player_insignia)\b')
+
+
+@pytest.fixture
+def seeded(app, create_player, auth_headers):
+
+    admin = create_player('admin', role = 'admin')
+    player = create_player('p1')
+    other = create_player('p2')
+    with app.app_context():
+        bosses = [Boss(name = f'boss-{i}', health = 100) for i in range(3)]
+        db.session.add_all(bosses)
+        db.session.flush()
+        db.session.add_all([Phase(name = f'fase-{i}', boss_id = boss.id, reward_coins = 5, reward_experience = 50) for i, boss in enumerate(bosses)])
+        db.session.add_all([Insignia(name = f'conquista-{i}', xp_required = 100 * i, reward_coins = 1) for i in range(1, 4)])
+        db.session.add_all([Item(name = f'item-{i}') for i in range(3)])
+        db.session.flush()
+        db.session.add(PlayerItem(player_id = player.id, item_id = 1))
+        for p in (player, other):
+            for i in range(30):
+                db.session.add(Battle(player_id = p.id, boss_id = bosses[i % 3].id, result = ResultType.WIN, reward_coins = 1, reward_experience = 1))
+        db.session.commit()
+
+    return {'admin': auth_headers(admin), 'player': auth_headers(player), 'player_id': player.id, 'other_id': other.id}
+
+
+def _cursors(client, seeded) -> tuple[str, str]:
+    """
+    Cursores da segunda página das listagens. A primeira página percorre a
+    tabela pela chave primária e para no LIMIT, então fica fora da checagem.
+    """
+
+    player_cursor = client.get(f"/players/{seeded['player_id']}/battles", query_string = {'limit': 10}, headers = seeded['player']).headers['X-Next-Cursor']
+    battles_cursor = client.get('/battles/', query_string = {'limit': 10}).headers['X-Next-Cursor']
+    return player_cursor, battles_cursor
+
+
+def _hot_paths(client, seeded, player_cursor: str, battles_cursor: str) -> None:
+    """Exercita as rotas dos caminhos críticos como um cliente real."""
+
+    player_id, headers, admin = seeded['player_id'], seeded['player'], seeded['admin']
+
+    client.post('/auth/login', json = {'username': 'p1', 'password': '123'})
+    client.post(f'/players/{player_id}/battles', json = {'result': 'win', 'boss_id': 1, 'reward_coins': 1, 'reward_experience': 250}, headers = headers)
+    client.post(f'/players/{player_id}/phases', json = {'phase_id': 1}, headers = headers)
+    client.post(f'/players/{player_id}/phases', json = {'phase_id': 2}, headers = headers)
+
+    client.get(f'/players/{player_id}/battles', query_string = {'limit': 10, 'cursor': player_cursor}, headers = headers)
+    client.get('/battles/', query_string = {'limit': 10, 'cursor': battles_cursor})
+
+    client.get(f'/players/{player_id}/phases', headers = headers)
+    client.get(f'/players/{player_id}/insignias', headers = headers)
+    client.get(f'/players/{player_id}/insignia', headers = headers)
+    client.get(f'/players/{player_id}/items', headers = headers)
+    client.get(f'/players/{player_id}/profile', headers = headers)
+    client.get(f'/players/{player_id}/stats', headers = headers)
+    client.put('/battles/1', json = {'player_id': seeded['other_id']}, headers = admin)
+
+
+def test_hot_paths_do_not_scan_large_tables(app, client, seeded):
+
+    cursors = _cursors(client, seeded)
+    statements: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.startswith(('EXPLAIN', 'PRAGMA')):
+            statements.append((statement, tuple(parameters or ())))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        _hot_paths(client, seeded, *cursors)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    assert statements
+    failures = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            if scans:
+                failures.append(f'{statement}\n    {scans}')
+
+    assert not failures, 'Varredura completa de tabela:\n' + '\n'.join(failures)
@@ -0,0 +1,74 @@
+import threading
+from collections import Counter
+from app.db import db
+from app.models import Insignia, Player, PlayerInsignia
+
+
+def test_concurrent_rewards_are_not_lost(app, create_player, auth_headers):
+    """Várias threads registram vitórias para o mesmo jogador ao mesmo tempo."""
+
+    with app.app_context():
+        db.session.add_all([
+            Insignia(name = 'bronze', xp_required = 100, reward_coins = 10),
+            Insignia(name = 'prata', xp_required = 1000, reward_coins = 50),
+            Insignia(name = 'ouro', xp_required = 2000, reward_coins = 200)
+        ])
+        db.session.commit()
+
+    player = create_player('stress')
+    headers = auth_headers(player)
+    threads, per_thread = 8, 40
+    reward_coins, reward_experience = 3, 7
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            response = client.post(
+                f'/players/{player.id}/battles',
+                json = {'result': 'win', 'reward_coins': reward_coins, 'reward_experience': reward_experience},
+                headers = headers
+            )
+            with lock:
+                statuses[response.status_code] += 1
+
+    workers = [threading.Thread(target = worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    assert statuses == {201: threads * per_thread}
+    with app.app_context():
+        stored = db.session.get(Player, player.id)
+        granted = PlayerInsignia.query.filter_by(player_id = player.id).all()
+
+        assert stored.experience == threads * per_thread * reward_experience
+        assert sorted(pi.insignia.name for pi in granted) == ['bronze', 'ouro', 'prata']
+        assert stored.coins == threads * per_thread * reward_coins + sum(pi.insignia.reward_coins for pi in granted)
+
+
+def test_insignia_below_current_experience_is_granted(client, create_player, auth_headers):
+
+    admin_headers = auth_headers(create_player('admin', role = 'admin'))
+    rich = create_player('p1')
+    poor = create_player('p2')
+    headers = auth_headers(rich)
+    client.post(f'/players/{rich.id}/battles', json = {'result': 'win', 'reward_experience': 500}, headers = headers)
+
+    created = client.post('/insignias/', json = {'name': 'bronze', 'xp_required': 100, 'reward_coins': 7}, headers = admin_headers)
+    assert created.status_code == 201
+    # Uma conquista difícil que depois fica mais fácil
+    hard = client.post('/insignias/', json = {'name': 'ouro', 'xp_required': 5000, 'reward_coins': 20}, headers = admin_headers).get_json()
+    client.put(f"/insignias/{hard['id']}", json = {'xp_required': 400}, headers = admin_headers)
+
+    # Uma recompensa seguinte não concede nem credita de novo
+    client.post(f'/players/{rich.id}/battles', json = {'result': 'win', 'reward_experience': 10}, headers = headers)
+
+    profile = client.get(f'/players/{rich.id}/profile', query_string = {'include': 'insignias'}, headers = headers).get_json()
+    assert sorted(entry['insignia_id'] for entry in profile['insignias']) == [created.get_json()['id'], hard['id']]
+    assert client.get(f'/players/{rich.id}', headers = headers).get_json()['coins'] == 27
+
+    profile = client.get(f'/players/{poor.id}/profile', query_string = {'include': 'insignias'}, headers = auth_headers(poor)).get_json()
+    assert profile['insignias'] == []